@@ -1,15 +1,28 @@
+import time
+_IMPORT_STARTED = time.perf_counter()
 import os
 import sys
-import time
+import asyncio
+import argparse
 import json
-import requests
 from dotenv import load_dotenv
-import tweepy
-from near_api.providers import JsonProvider
-from near_api.signer import KeyPair, Signer
-from near_api.account import Account
 from datetime import datetime, timezone
 
+# Shared modules live in the repository's common/ package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from market_cache import MarketSnapshot, MarketSnapshotCache
+from market_index import normalize_description
+from fuzzy_index import FuzzyMarketIndex
+from reply_cache import RenderedReplyCache
+from mention_cursor import read_since_id, write_since_id, iter_new_mentions
+from twitter_client import get_client, TokenBucket, ReplyDispatcher
+from daemon import run_daemon
+from common.market_mirror import MarketMirror, DEFAULT_MIRROR_PATH
+from common.metrics import metrics
+from common.settlement import format_near
+from common.app_context import AppContext
+from commands import parse_command, CommandError
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,14 +30,23 @@ load_dotenv()
 CONTRACT_ID = os.getenv("CONTRACT_ID")
 ORACLE_ACCOUNT_ID = os.getenv("ORACLE_ACCOUNT_ID")
 ORACLE_PRIVATE_KEY = os.getenv("ORACLE_PRIVATE_KEY")
-if not (CONTRACT_ID and ORACLE_ACCOUNT_ID and ORACLE_PRIVATE_KEY):
-    raise ValueError("Missing one or more NEAR environment variables.")
 
-# Set up NEAR RPC provider and account for view functions
-provider = JsonProvider("https://rpc.testnet.near.org")
-key_pair = KeyPair(ORACLE_PRIVATE_KEY)
-signer = Signer(ORACLE_ACCOUNT_ID, key_pair)
-near_account = Account(provider, signer)
+# NEAR and Twitter clients are built on first use, so importing this module is
+# cheap and needs no secrets. main() validates the environment up front.
+context = AppContext(required=("CONTRACT_ID", "ORACLE_ACCOUNT_ID", "ORACLE_PRIVATE_KEY"))
+
+def _build_near_account():
+    """
+    NEAR RPC provider and account for view functions.
+    """
+    context.validate()
+    providers = context.import_module("near_api.providers")
+    signer = context.import_module("near_api.signer")
+    account = context.import_module("near_api.account")
+    key_pair = signer.KeyPair(ORACLE_PRIVATE_KEY)
+    return account.Account(providers.JsonProvider("https://rpc.testnet.near.org"), signer.Signer(ORACLE_ACCOUNT_ID, key_pair))
+
+context.provide("near_account", _build_near_account)
 
 # Twitter API credentials
 TWITTER_BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN")
@@ -35,51 +57,143 @@ TWITTER_ACCESS_SECRET = os.getenv("TWITTER_ACCESS_SECRET")
 TWITTER_USER_ID = os.getenv("TWITTER_USER_ID")  # Your Twitter user ID
 WEB_APP_BASE_URL = os.getenv("WEB_APP_BASE_URL")
 
-def parse_endtime_to_ns(endtime_str: str) -> str:
+# File holding the id of the newest mention already handled.
+LAST_TWEET_ID_FILE = os.getenv("LAST_TWEET_ID_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "last_tweet_id.txt"))
+
+# Seconds a market snapshot stays valid in a long-running process. Unset means the
+# snapshot is only refreshed when a new batch of mentions starts.
+MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL")) if os.getenv("MARKET_CACHE_TTL") else None
+
+# Reply pool size and pacing (replies per second, with bursts up to REPLY_BURST).
+REPLY_WORKERS = int(os.getenv("REPLY_WORKERS", "4"))
+REPLY_RATE = float(os.getenv("REPLY_RATE", "1"))
+REPLY_BURST = int(os.getenv("REPLY_BURST", "5"))
+
+# Daemon mode: mention polling bounds and market refresh period, in seconds.
+DAEMON_POLL_MIN = float(os.getenv("DAEMON_POLL_MIN", "15"))
+DAEMON_POLL_MAX = float(os.getenv("DAEMON_POLL_MAX", "120"))
+DAEMON_MARKET_REFRESH = float(os.getenv("DAEMON_MARKET_REFRESH", "60"))
+
+# Fuzzy market lookups: `market` uses the best candidate if it scores at least
+# FUZZY_MIN_SCORE (trigram Dice coefficient, 0-1), beats the runner-up by
+# FUZZY_MIN_MARGIN and has the same words up to typos; otherwise, and always for
+# `bet`, the candidate is only suggested in the reply.
+FUZZY_MIN_SCORE = float(os.getenv("FUZZY_MIN_SCORE", "0.7"))
+FUZZY_MIN_MARGIN = float(os.getenv("FUZZY_MIN_MARGIN", "0.1"))
+
+# Metrics are only collected when a report path is set: a .json path gets a JSON
+# run report, anything else Prometheus text. It is rewritten after every batch.
+METRICS_REPORT = os.getenv("METRICS_REPORT")
+if METRICS_REPORT:
+    metrics.enable()
+
+def view_contract(method_name, args):
     """
-    Parses an end time string in "YYYY-MM-DD HH:MM:SS" format (assumed UTC)
-    and returns the epoch time in nanoseconds as a string.
+    Call a view function on the contract and return its decoded result.
     """
-    dt = datetime.strptime(endtime_str, "%Y-%m-%d %H:%M:%S")
-    dt = dt.replace(tzinfo=timezone.utc)
-    ns = int(dt.timestamp() * 1e9)
-    return str(ns)
+    metrics.inc("near_view_calls_total", method=method_name)
+    return context.near_account.view_function(CONTRACT_ID, method_name, args).get("result")
 
-def get_all_markets():
+# Local SQLite copy of the contract's markets, synced incrementally.
+context.provide("market_mirror", lambda: MarketMirror(view_contract, os.getenv("MARKET_MIRROR_PATH", DEFAULT_MIRROR_PATH)))
+
+@metrics.timed("fetch_all_markets")
+def fetch_all_markets():
+    """
+    Sync the local market mirror with the contract and return the active markets.
+    Only new and still-unresolved markets are downloaded.
     """
-    Fetch all markets from the NEAR contract using the view_function.
-    Expects the contract's "getAllMarkets" method to return a dict with a "result" key.
+    return context.market_mirror.load()
+
+market_cache = MarketSnapshotCache(fetch_all_markets, ttl=MARKET_CACHE_TTL)
+
+def get_market_snapshot():
+    """
+    Return the shared market snapshot, fetching it at most once per batch or TTL.
+    On RPC errors an empty snapshot is returned and nothing is cached.
     """
     try:
-        res = near_account.view_function(CONTRACT_ID, "getAllMarkets", {})
-        markets = res.get("result", [])
+        return market_cache.get()
     except Exception as e:
-        print("Error calling getAllMarkets:", e)
-        markets = []
-    return markets
+        metrics.inc("errors_total", stage="get_markets")
+        print("Error loading markets from the market mirror:", e)
+        return MarketSnapshot([], 0, 0)
+
+
+def get_reply_client():
+    """
+    Shared user-context client for posting replies. Raw responses are returned so
+    the dispatcher can read the rate-limit headers.
+    """
+    return get_client(
+        consumer_key=TWITTER_API_KEY,
+        consumer_secret=TWITTER_API_SECRET,
+        access_token=TWITTER_ACCESS_KEY,
+        access_token_secret=TWITTER_ACCESS_SECRET,
+        return_type=context.import_module("requests").Response
+    )
 
+context.provide("reply_dispatcher", lambda: ReplyDispatcher(
+    get_reply_client(),
+    TokenBucket(REPLY_RATE, REPLY_BURST),
+    workers=REPLY_WORKERS
+))
+
+def get_reply_dispatcher():
+    return context.reply_dispatcher
 
 def reply_to_tweet(tweet_id, message):
     """
-    Reply to the tweet with the provided message using the Tweepy client.
+    Queue a reply to the tweet with the provided message. Replies are sent
+    concurrently by the shared dispatcher; call drain() on it to wait for them.
     """
-    try:
-        client = tweepy.Client(
-            consumer_key=TWITTER_API_KEY,
-            consumer_secret=TWITTER_API_SECRET,
-            access_token=TWITTER_ACCESS_KEY,
-            access_token_secret=TWITTER_ACCESS_SECRET
-        )
-        response = client.create_tweet(in_reply_to_tweet_id=tweet_id, text=message)
-    except Exception as e:
-        print("Error replying to tweet:", e)
+    get_reply_dispatcher().submit(tweet_id, message)
 
-def reply_all_markets(tweet_id):
+# Typo-tolerant index over active market descriptions, updated with each new snapshot.
+fuzzy_index = FuzzyMarketIndex()
+
+def find_market(snapshot, description, fuzzy=True):
     """
-    Reply with a list of active (unresolved) markets.
+    Active market for a tweeted description, or (None, suggestion) where
+    suggestion is the description of the closest market, if any. An exact match
+    (case and whitespace insensitive) wins; otherwise, with `fuzzy`, a confident
+    fuzzy match is used. Without `fuzzy` the closest market is only suggested.
+    """
+    market = snapshot.index.market_by_description(description)
+    if market:
+        return market, None
+    fuzzy_index.sync(snapshot.version, snapshot.active)
+    market_id, best = fuzzy_index.match(description, FUZZY_MIN_SCORE, FUZZY_MIN_MARGIN)
+    closest = snapshot.index.market_by_id(best[1]) if best else None
+    if closest is None:
+        metrics.inc("fuzzy_lookups_total", result="none")
+        return None, None
+    if fuzzy and market_id is not None:
+        metrics.inc("fuzzy_lookups_total", result="matched")
+        return closest, None
+    metrics.inc("fuzzy_lookups_total", result="suggested")
+    return None, closest.get("description")
+
+def did_you_mean(suggestion):
+    return f" Did you mean '{suggestion}'?" if suggestion else ""
+
+# Replies that only depend on the market snapshot, rendered once per snapshot and
+# shared by every tweet asking the same thing.
+reply_cache = RenderedReplyCache()
+
+def cached_reply(command, args, render):
+    """
+    Render the reply for (command, args) against the current snapshot, reusing an
+    identical reply already rendered (or being rendered) for the same snapshot.
+    """
+    snapshot = get_market_snapshot()
+    return reply_cache.get_or_render(command, args, snapshot.version, lambda: render(snapshot, *args))
+
+def render_all_markets(snapshot):
+    """
+    List of active (unresolved) markets.
     """
-    markets = get_all_markets()
-    active_markets = [m for m in markets if not m.get("resolved", False)]
+    active_markets = snapshot.active
     if not active_markets:
         message = "No current active markets found."
     else:
@@ -94,136 +208,216 @@ def reply_all_markets(tweet_id):
         message = "Active Markets:\n" + "\n".join(lines)
         if len(message) > 280:
             message = message[:277] + "..."
-    reply_to_tweet(tweet_id, message)
+    return message
 
-def reply_address_bets(tweet_id, address):
+def reply_all_markets(tweet_id):
     """
-    Reply with bets for a given address by scanning through active markets.
+    Reply with a list of active (unresolved) markets.
     """
-    markets = get_all_markets()
-    active_markets = [m for m in markets if not m.get("resolved", False)]
+    reply_to_tweet(tweet_id, cached_reply("markets", (), render_all_markets))
 
+def render_address_bets(snapshot, address):
+    """
+    Stakes of a given address per active market, with what each outcome would pay
+    it, from the snapshot's settlement book. Amounts are exact, in NEAR.
+    """
     lines = []
-    for m in active_markets:
-        print(m)
-        bets = m.get("bets", [])
-        user_bets = [bet for bet in bets if bet.get("user") == address]
-        for bet in user_bets:
-            if bet.get("outcome") == 0:
-                outcome = "Yes"
-            else:
-                outcome = "No"
-            lines.append(f"Market: {m.get('description')}, Outcome: {outcome}, Amount {bet.get('amount')}")
+    for position in snapshot.settlement.positions(address):
+        lines.append(f"Market: {position.market.get('description')}, "
+                     f"Staked Yes {format_near(position.staked_yes)} / No {format_near(position.staked_no)}, "
+                     f"Pays Yes {format_near(position.payout_yes)} / No {format_near(position.payout_no)}")
 
     if not lines:
         message = f"No bets found for address {address}."
     else:
-        message = f"Bets for {address}:\n" + "\n".join(lines)
+        message = f"Bets for {address} (NEAR):\n" + "\n".join(lines)
         if len(message) > 280:
             message = message[:277] + "..."
-    reply_to_tweet(tweet_id, message)
+    return message
 
+def reply_address_bets(tweet_id, address):
+    """
+    Reply with bets for a given address.
+    """
+    reply_to_tweet(tweet_id, cached_reply("bets", (address,), render_address_bets))
 
-def reply_market_info(tweet_id, description):
+def format_odds(probability):
+    return f" ({float(probability):.0%})" if probability is not None else ""
+
+def render_market_info(snapshot, description):
     """
-    Reply with information for a market matching the provided description (case-insensitive).
+    Information for a market matching the provided (normalized) description.
     """
-    markets = get_all_markets()
-    active_markets = [m for m in markets if not m.get("resolved", False)]
-    market = None
-    for m in active_markets:
-        if m.get("description", "").lower() == description.lower():
-            market = m
-            break
+    market, suggestion = find_market(snapshot, description)
     if market:
         timestamp_seconds = int(market.get("endTime")) / 1e9
         dt = datetime.fromtimestamp(timestamp_seconds, tz=timezone.utc)
         formatted_date = dt.strftime("%Y-%m-%d %H:%M:%S.%f %Z")
-        yesPool = int(market.get("yesPool")) / 1e24
-        noPool = int(market.get("noPool")) / 1e24
-        message = f"Market: {market.get('description')}\nEnds: {formatted_date}\nYes Pool: {yesPool}\nNo Pool: {noPool}"
+        odds = snapshot.settlement.odds(market.get("id"))
+        message = (f"Market: {market.get('description')}\nEnds: {formatted_date}\n"
+                   f"Yes Pool: {format_near(market.get('yesPool'))} NEAR{format_odds(odds.yes_probability)}\n"
+                   f"No Pool: {format_near(market.get('noPool'))} NEAR{format_odds(odds.no_probability)}")
     else:
-        message = f"No active market found with description '{description}'."
+        message = f"No active market found with description '{description}'." + did_you_mean(suggestion)
 
     if len(message) > 280:
         message = message[:277] + "..."
-    reply_to_tweet(tweet_id, message)
+    return message
+
+def reply_market_info(tweet_id, description):
+    """
+    Reply with information for a market matching the provided description (case-insensitive).
+    """
+    reply_to_tweet(tweet_id, cached_reply("market", (normalize_description(description),), render_market_info))
+
+def reply_create_link(tweet_id, command):
+    res = "_".join(command.market_tokens)
+    reply_to_tweet(tweet_id, "Visit: " + WEB_APP_BASE_URL + "/create/" + res + "/" + command.end_time_ns)
+
+def reply_bet_link(tweet_id, command):
+    # Only an exact match gets a bet link: a near miss may be another team's market.
+    market, suggestion = find_market(get_market_snapshot(), command.market, fuzzy=False)
+    if market:
+        marketId = str(market.get("id"))
+        reply_to_tweet(tweet_id, "Visit: " + WEB_APP_BASE_URL + "/bet/" + marketId + "/" + command.outcome + "/" + command.amount)
+    else:
+        reply_to_tweet(tweet_id, "Market not found." + did_you_mean(suggestion))
+
+# Command keyword -> handler(tweet_id, command).
+HANDLERS = {
+    "create": reply_create_link,
+    "bet": reply_bet_link,
+    "bets": lambda tweet_id, command: reply_address_bets(tweet_id, command.address),
+    "markets": lambda tweet_id, command: reply_all_markets(tweet_id),
+    "market": lambda tweet_id, command: reply_market_info(tweet_id, command.market),
+}
+
+@metrics.timed("handle_mention")
+def handle_mention(tweet):
+    """
+    Parse tweet text and reply to the command it contains.
+    Expected format examples:
+    - "@betbotx create sport NBA New York Knics win 2024-03-01 12:00:00"
+    - "@betbotx create sport NBA New York Knics > 10 2024-03-01 12:00:00"
+    - "@betbotx bet sport MLS LA Galaxy > 1 1.4 yes"
+    - "@betbotx markets"
+    - "@betbotx bets <address>"
+    - "@betbotx market sport NBA New York Knics win"
+    Malformed commands are answered with the parse error, without touching NEAR.
+    """
+    try:
+        command = parse_command(tweet.text)
+    except CommandError as e:
+        metrics.inc("mentions_total", command="invalid")
+        reply_to_tweet(tweet.id, str(e))
+        return
+    metrics.inc("mentions_total", command=command.name)
+    HANDLERS[command.name](tweet.id, command)
+
+def fetch_new_mentions():
+    """
+    Return all mentions newer than the persisted cursor, oldest first.
+    """
+    client = get_client(bearer_token=TWITTER_BEARER_TOKEN)
+    return list(iter_new_mentions(client, TWITTER_USER_ID, read_since_id(LAST_TWEET_ID_FILE)))
+
+def commit_cursor(tweet_id):
+    write_since_id(LAST_TWEET_ID_FILE, tweet_id)
+
+def drain_replies():
+    """
+    Wait for every queued reply, then record the batch in the metrics report.
+    """
+    with metrics.span("drain_replies"):
+        sent, failed = get_reply_dispatcher().drain()
+    metrics.inc("replies_total", sent, status="sent")
+    metrics.inc("replies_total", failed, status="failed")
+    report_metrics()
+    return sent, failed
+
+def report_metrics():
+    if not METRICS_REPORT:
+        return
+    for name, value in market_cache.stats().items():
+        metrics.set_gauge(f"market_cache_{name}", value)
+    for name, value in reply_cache.stats().items():
+        metrics.set_gauge(f"reply_cache_{name}", value)
+    metrics.write_report(METRICS_REPORT)
 
 def process_mentions():
     """
-    Fetch recent mentions and process commands:
+    Fetch mentions newer than the persisted cursor and process their commands:
       - /markets: Reply with all current markets.
       - /bets_ADDRESS: Reply with bets for the given address.
       - /market_DESCRIPTION: Reply with market info for a market with the given description.
+    The cursor is advanced after every handled tweet, so a crash never causes double replies.
     """
-    client = tweepy.Client(
-        consumer_key=TWITTER_API_KEY,
-        consumer_secret=TWITTER_API_SECRET,
-        access_token=TWITTER_ACCESS_KEY,
-        access_token_secret=TWITTER_ACCESS_SECRET
-    )
-    client2 = tweepy.Client(TWITTER_BEARER_TOKEN)
     if not TWITTER_USER_ID:
         print("TWITTER_USER_ID not set.")
         return
 
-    response = client2.get_users_mentions(TWITTER_USER_ID, max_results=10)
-    if not response.data:
+    # Every handler in this batch shares one market mirror sync. With a TTL the
+    # snapshot expires on its own instead.
+    if market_cache.ttl is None:
+        market_cache.invalidate()
+
+    handled = 0
+    for tweet in fetch_new_mentions():
+        try:
+            handle_mention(tweet)
+        except Exception as e:
+            metrics.inc("errors_total", stage="handle_mention")
+            print(f"Error handling tweet {tweet.id}:", e)
+        commit_cursor(tweet.id)
+        handled += 1
+
+    if not handled:
         print("No new mentions found.")
         return
+    sent, failed = drain_replies()
+    print(f"Handled {handled} mentions ({sent} replies sent, {failed} failed).")
+    print("Market cache:", market_cache.stats())
+    print("Reply cache:", reply_cache.stats())
 
-    tweets = sorted(
-        response.data,
-        key=lambda t: datetime.strptime(t.created_at, "%a %b %d %H:%M:%S %z %Y") if t.created_at else datetime.min
-    )
-
+def run_forever():
     """
-    Parse tweet text and extract command details.
-    Expected format examples:
-    - "@betbotx create sport NBA New York Knics win 2024-03-01 12:00:00"
-    - "@betbotx create sport NBA New York Knics > 10 2024-03-01 12:00:00"
-    - "@betbotx bet sport MLS LA Galaxy > 1 1.4 yes"
-    - "@betbotx markets"
-    - "@betbotx bets <address>"
-    - "@betbotx market sport NBA New York Knics win"
+    Long-running mode: poll mentions on an adaptive interval and refresh markets in the background.
     """
-    for tweet in tweets:
-        text = tweet.text.strip()
-        text = text.replace("@betbotx", "").strip()
-        tokens = text.strip().split()
-
-        if text.startswith("create"):
-            end_date = tokens[-2]
-            end_time = tokens[-1]
-            endtime_str = f"{end_date} {end_time}"
-            epoch = parse_endtime_to_ns(endtime_str)
-            res = "_".join(tokens[1:-2])
-            reply_to_tweet(tweet.id, "Visit: " + WEB_APP_BASE_URL + "/create/" + res + "/" + epoch)
-        elif text.startswith("bet"):
-            market = " ".join(tokens[1:-2])
-            amt = tokens[-2]
-            outcome = tokens[-1]
-            markets = get_all_markets()
-            market = next((m for m in markets if m.get("description", "").lower() == market.lower()), None)
-
-            if market:
-                marketId = str(market.get("id"))
-                reply_to_tweet(tweet.id, "Visit: " + WEB_APP_BASE_URL + "/bet/" + marketId + "/" + outcome + "/" + amt)
-            else:
-                reply_to_tweet(tweet.id, "Market not found")
-        elif text.startswith("markets"):
-            reply_all_markets(tweet.id)
-        elif text.startswith("bets"):
-            print(tokens[1])
-            reply_address_bets(tweet.id, tokens[1])
-        elif text.startswith("market"):
-            reply_market_info(tweet.id, " ".join(tokens[1:]))
-        else:
-            reply_to_tweet(tweet.id, "Invalid command")
+    if not TWITTER_USER_ID:
+        print("TWITTER_USER_ID not set.")
+        return
+    try:
+        asyncio.run(run_daemon(
+            fetch_new_mentions,
+            handle_mention,
+            commit_cursor,
+            drain_replies,
+            market_cache.refresh,
+            poll_min=DAEMON_POLL_MIN,
+            poll_max=DAEMON_POLL_MAX,
+            refresh_interval=DAEMON_MARKET_REFRESH
+        ))
+    finally:
+        get_reply_dispatcher().close()
 
 def main():
-    process_mentions()
+    parser = argparse.ArgumentParser(description="BetBotX Twitter agent")
+    parser.add_argument("--daemon", action="store_true", help="run continuously instead of one polling pass")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long imports and client setup took")
+    args = parser.parse_args()
+    context.validate()
+    if args.profile_startup:
+        import atexit
+        atexit.register(lambda: print(context.startup_report()))
+    if args.daemon:
+        run_forever()
+    else:
+        process_mentions()
+
+context.record("import bot", time.perf_counter() - _IMPORT_STARTED)
 
 if __name__ == "__main__":
-    # Run one iteration (GitHub Actions can schedule this every 15 minutes)
+    # Run one iteration (GitHub Actions can schedule this every 15 minutes),
+    # or pass --daemon to keep polling.
     main()
@@ -0,0 +1,132 @@
+import html
+import re
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+from common.market_spec import parse_market, InvalidMarket
+
+# NEAR account ids: 2-64 lowercase characters, dot-separated parts of [a-z0-9]
+# joined by single "-" or "_".
+ACCOUNT_ID_RE = re.compile(r"^(([a-z\d]+[-_])*[a-z\d]+\.)*([a-z\d]+[-_])*[a-z\d]+$")
+OUTCOMES = ("yes", "no")
+END_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class CommandError(ValueError):
+    """
+    Raised when a mention is not a well-formed command; the message is the reply text.
+    """
+
+
+class Command:
+    """
+    One parsed mention. `name` is the command keyword; the other fields are set
+    by the commands that take them.
+
+      - create:  market (html-unescaped description), spec (MarketSpec),
+                 market_tokens (description tokens as tweeted), end_time_ns (str)
+      - bet:     market, amount (original text of a positive number), outcome ("yes"/"no")
+      - bets:    address (NEAR account id)
+      - markets: no arguments
+      - market:  market
+    """
+
+    __slots__ = ("name", "market", "spec", "market_tokens", "end_time_ns", "amount", "outcome", "address")
+
+    def __init__(self, name, **fields):
+        self.name = name
+        for slot in self.__slots__[1:]:
+            setattr(self, slot, fields.get(slot))
+
+    def __repr__(self):
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__[1:]
+                           if getattr(self, slot) is not None)
+        return f"Command({self.name!r}{', ' if fields else ''}{fields})"
+
+
+def tokenize(text):
+    """
+    Split tweet text into (raw, unescaped) token lists, dropping the leading
+    @handles that every reply to the bot starts with.
+    """
+    raw = text.split()
+    start = 0
+    while start < len(raw) and raw[start].startswith("@"):
+        start += 1
+    raw = raw[start:]
+    return raw, [html.unescape(token) if "&" in token else token for token in raw]
+
+
+def _parse_create(raw, tokens):
+    if len(tokens) < 4:
+        raise CommandError("Usage: create <market> <YYYY-MM-DD> <HH:MM:SS>")
+    try:
+        end = datetime.strptime(f"{tokens[-2]} {tokens[-1]}", END_TIME_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise CommandError("Invalid end time: use YYYY-MM-DD HH:MM:SS (UTC)")
+    market = " ".join(tokens[1:-2])
+    try:
+        spec = parse_market(market)
+    except InvalidMarket as e:
+        raise CommandError(f"Invalid market: {e}")
+    return Command("create", market=market, spec=spec, market_tokens=raw[1:-2],
+                   end_time_ns=str(int(end.timestamp() * 1e9)))
+
+
+def _parse_bet(raw, tokens):
+    if len(tokens) < 4:
+        raise CommandError("Usage: bet <market> <amount> <yes|no>")
+    amount = tokens[-2]
+    try:
+        value = Decimal(amount)
+    except InvalidOperation:
+        value = None
+    if value is None or not value.is_finite() or value <= 0:
+        raise CommandError(f"Invalid amount: {amount}")
+    outcome = tokens[-1].lower()
+    if outcome not in OUTCOMES:
+        raise CommandError(f"Invalid outcome: {tokens[-1]} (use yes or no)")
+    return Command("bet", market=" ".join(tokens[1:-2]), amount=amount, outcome=outcome)
+
+
+def _parse_bets(raw, tokens):
+    if len(tokens) != 2:
+        raise CommandError("Usage: bets <address>")
+    address = tokens[1].lower()
+    if not (2 <= len(address) <= 64 and ACCOUNT_ID_RE.match(address)):
+        raise CommandError(f"Invalid address: {tokens[1]}")
+    return Command("bets", address=address)
+
+
+def _parse_markets(raw, tokens):
+    return Command("markets")
+
+
+def _parse_market(raw, tokens):
+    if len(tokens) < 2:
+        raise CommandError("Usage: market <market>")
+    return Command("market", market=" ".join(tokens[1:]))
+
+
+# Exact keyword -> argument parser.
+PARSERS = {
+    "create": _parse_create,
+    "bet": _parse_bet,
+    "bets": _parse_bets,
+    "markets": _parse_markets,
+    "market": _parse_market,
+}
+
+
+def parse_command(text):
+    """
+    Parse a mention into a Command. Raises CommandError for unknown keywords and
+    malformed arguments, before anything touches the network.
+    """
+    raw, tokens = tokenize(text)
+    if not tokens:
+        raise CommandError("Invalid command")
+    parser = PARSERS.get(tokens[0].lower())
+    if parser is None:
+        raise CommandError("Invalid command")
+    return parser(raw, tokens)
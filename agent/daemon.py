@@ -0,0 +1,98 @@
+import asyncio
+import signal
+
+
+class AdaptiveInterval:
+    """
+    Polling interval that drops to `minimum` when there was work and doubles
+    (up to `maximum`) after every idle or failed poll.
+    """
+
+    def __init__(self, minimum, maximum):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.current = minimum
+
+    def update(self, had_work):
+        if had_work:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * 2)
+        return self.current
+
+
+async def _refresh_markets_forever(refresh_markets, interval, stop):
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(refresh_markets)
+        except Exception as e:
+            print("Error refreshing markets:", e)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _poll_once(fetch_mentions, handle_mention, commit_cursor, drain_replies, semaphore):
+    tweets = await asyncio.to_thread(fetch_mentions)
+    if not tweets:
+        return 0
+
+    async def handle(tweet):
+        async with semaphore:
+            await asyncio.to_thread(handle_mention, tweet)
+
+    # Commands run concurrently, but the cursor only advances over the
+    # completed prefix, so an interrupted batch never skips an unhandled tweet.
+    tasks = [asyncio.create_task(handle(tweet)) for tweet in tweets]
+    for tweet, task in zip(tweets, tasks):
+        try:
+            await task
+        except Exception as e:
+            print(f"Error handling tweet {tweet.id}:", e)
+        commit_cursor(tweet.id)
+    sent, failed = await asyncio.to_thread(drain_replies)
+    print(f"Handled {len(tweets)} mentions ({sent} replies sent, {failed} failed).")
+    return len(tweets)
+
+
+async def run_daemon(fetch_mentions, handle_mention, commit_cursor, drain_replies, refresh_markets,
+                     poll_min=15.0, poll_max=120.0, refresh_interval=60.0, concurrency=8):
+    """
+    Poll mentions until SIGINT/SIGTERM, keeping clients and the market snapshot warm.
+
+      - fetch_mentions():      list of new tweets, oldest first
+      - handle_mention(tweet): runs one command (blocking; called in a worker thread)
+      - commit_cursor(id):     persists the high-water mark
+      - drain_replies():       waits for queued replies, returns (sent, failed)
+      - refresh_markets():     refetches the market snapshot
+
+    On shutdown the in-flight batch finishes and its replies are drained first.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    interval = AdaptiveInterval(poll_min, poll_max)
+    refresher = asyncio.create_task(_refresh_markets_forever(refresh_markets, refresh_interval, stop))
+    print(f"Daemon started (poll {poll_min}-{poll_max}s, market refresh {refresh_interval}s).")
+
+    try:
+        while not stop.is_set():
+            try:
+                handled = await _poll_once(fetch_mentions, handle_mention, commit_cursor, drain_replies, semaphore)
+            except Exception as e:
+                print("Error polling mentions:", e)
+                handled = 0
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval.update(handled > 0))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        stop.set()
+        await refresher
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        print("Daemon stopped.")
@@ -0,0 +1,213 @@
+import threading
+from collections import Counter
+from market_index import normalize_description
+
+# Operators and numbers decide what a market is about ("> 10" vs "> 100"), so
+# they are never matched fuzzily: a candidate must contain exactly the same ones,
+# in the same order, as the query.
+OPERATORS = frozenset(("<", ">", "="))
+
+# Trigrams found in more than this many descriptions ("spo", "win") are too common
+# to narrow the search; they only count when candidates are scored.
+MAX_POSTING = 2000
+# Candidates scored exactly per query, picked by how many rare trigrams they share.
+MAX_CANDIDATES = 64
+
+
+def split_tokens(tokens):
+    """
+    Split a tokenized description into (words, keys): keys are the operators and
+    numbers, numbers as floats so that "10" and "10.0" agree; words are the rest.
+    """
+    words, keys = [], []
+    for token in tokens:
+        if token in OPERATORS:
+            keys.append(token)
+            continue
+        try:
+            keys.append(float(token))
+        except ValueError:
+            words.append(token)
+    return words, tuple(keys)
+
+
+def trigrams(tokens):
+    """
+    Trigrams of each token padded with "$" on both ends, so short tokens and word
+    boundaries still produce grams: "win" -> {"$wi", "win", "in$"}.
+    """
+    grams = set()
+    for token in tokens:
+        padded = f"${token}$"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def max_typos(word):
+    """
+    Edits a word may be away from the word it is taken for: none for words of up
+    to three letters ("nba", "win"), one up to eight letters, two beyond.
+    """
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 8 else 2
+
+
+def within_edits(a, b, limit):
+    """
+    Whether the optimal string alignment distance (insertions, deletions,
+    substitutions and adjacent transpositions) between `a` and `b` is at most `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return False
+    return current[-1] <= limit
+
+
+def words_match(query_words, words):
+    """
+    Whether two descriptions have the same words up to typos: every word of each
+    is within max_typos of some word of the other. "lakers" never passes for
+    "clippers", nor "knicks" for "nets", however similar the rest is.
+    """
+    def covered(left, right):
+        return all(any(within_edits(word, other, max(max_typos(word), max_typos(other))) for other in right)
+                   for word in left)
+    return covered(query_words, words) and covered(words, query_words)
+
+
+class _Entry:
+    __slots__ = ("grams", "keys", "market_ids")
+
+    def __init__(self, grams, keys):
+        self.grams = grams
+        self.keys = keys
+        self.market_ids = set()
+
+
+class FuzzyMarketIndex:
+    """
+    Trigram index over the descriptions of active markets, for lookups that
+    tolerate typos ("knics" for "knicks").
+
+    Descriptions are normalized (normalize_description) and indexed once per
+    distinct description; markets sharing one resolve to the lowest id, like
+    MarketIndex. `sync(version, markets)` applies only the difference to the
+    previously synced markets: markets that appeared are indexed, markets that
+    were resolved or vanished are removed. Descriptions never change on chain,
+    so nothing else needs updating. Older versions are ignored.
+
+    Posting lists are kept per (keys, trigram), so a lookup only sees
+    descriptions with the query's operators and numbers. `search()` ranks
+    candidates by the Dice coefficient of the trigram sets of their words;
+    candidates are gathered from the query's rarest trigrams only, so a lookup
+    touches a few short posting lists instead of every market. `match()` decides
+    whether the best candidate is safe to act on.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._entries = {}
+        self._postings = {}
+        self._descriptions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._descriptions)
+
+    def sync(self, version, markets):
+        """
+        Bring the index up to date with `markets` (the active markets of snapshot
+        `version`). Returns (added, removed) market counts.
+        """
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                return 0, 0
+            current = {m["id"]: m for m in markets if not m.get("resolved", False)}
+            removed = [market_id for market_id in self._descriptions if market_id not in current]
+            added = [m for market_id, m in current.items() if market_id not in self._descriptions]
+            for market_id in removed:
+                self._remove(market_id)
+            for market in added:
+                self._add(market)
+            self.version = version
+            return len(added), len(removed)
+
+    def _add(self, market):
+        description = normalize_description(market.get("description", ""))
+        self._descriptions[market["id"]] = description
+        entry = self._entries.get(description)
+        if entry is None:
+            words, keys = split_tokens(description.split())
+            entry = self._entries[description] = _Entry(trigrams(words), keys)
+            for gram in entry.grams:
+                self._postings.setdefault((entry.keys, gram), set()).add(description)
+        entry.market_ids.add(market["id"])
+
+    def _remove(self, market_id):
+        description = self._descriptions.pop(market_id)
+        entry = self._entries[description]
+        entry.market_ids.discard(market_id)
+        if entry.market_ids:
+            return
+        del self._entries[description]
+        for gram in entry.grams:
+            key = (entry.keys, gram)
+            posting = self._postings[key]
+            posting.discard(description)
+            if not posting:
+                del self._postings[key]
+
+    def search(self, query, limit=5):
+        """
+        Up to `limit` (score, market_id, description) candidates for `query`, best
+        first. Scores are in [0, 1]; 1 means the same trigrams.
+        """
+        words, keys = split_tokens(normalize_description(query).split())
+        grams = trigrams(words)
+        if not grams:
+            return []
+        with self._lock:
+            postings = sorted((self._postings[(keys, g)] for g in grams if (keys, g) in self._postings), key=len)
+            rare = [p for p in postings if len(p) <= MAX_POSTING] or postings[:1]
+            hits = Counter()
+            for posting in rare:
+                hits.update(posting)
+            scored = []
+            for description, _ in hits.most_common(MAX_CANDIDATES):
+                entry = self._entries[description]
+                scored.append((2 * len(grams & entry.grams) / (len(grams) + len(entry.grams)), description))
+            scored.sort(key=lambda result: (-result[0], result[1]))
+            return [(score, min(self._entries[description].market_ids), description)
+                    for score, description in scored[:limit]]
+
+    def match(self, query, min_score, min_margin):
+        """
+        (market_id, best) for `query`: market_id is the best candidate's market if
+        it is a confident match, else None; best is the best (score, market_id,
+        description) candidate, or None if there is none.
+
+        Confident means it scores at least `min_score`, beats the runner-up by
+        `min_margin`, and has the query's words up to typos (words_match), so a
+        different team that shares the city and league is only ever suggested.
+        """
+        candidates = self.search(query, limit=2)
+        if not candidates:
+            return None, None
+        best = candidates[0]
+        score, market_id, description = best
+        runner_up = candidates[1][0] if len(candidates) > 1 else 0
+        if score < min_score or score - runner_up < min_margin:
+            return None, best
+        query_words, _ = split_tokens(normalize_description(query).split())
+        words, _ = split_tokens(description.split())
+        return (market_id if words_match(query_words, words) else None), best
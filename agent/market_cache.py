@@ -0,0 +1,103 @@
+import threading
+import time
+from market_index import MarketIndex
+from common.settlement import SettlementBook
+
+
+class MarketSnapshot:
+    """
+    An immutable view of the contract's markets as fetched at one point in time.
+    `version` increases by one on every refetch so callers can key derived data on it.
+    The lookup index and the settlement book of the active markets are built on
+    first use and then shared by every handler.
+    """
+
+    __slots__ = ("markets", "active", "version", "fetched_at", "_index", "_settlement")
+
+    def __init__(self, markets, version, fetched_at):
+        self.markets = markets
+        self.active = [m for m in markets if not m.get("resolved", False)]
+        self.version = version
+        self.fetched_at = fetched_at
+        self._index = None
+        self._settlement = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = MarketIndex(self.markets)
+        return self._index
+
+    @property
+    def settlement(self):
+        if self._settlement is None:
+            self._settlement = SettlementBook(self.active)
+        return self._settlement
+
+
+class MarketSnapshotCache:
+    """
+    Fetches markets once and shares the parsed snapshot with every handler.
+
+    With `ttl=None` the snapshot lives until `invalidate()` is called, which is how
+    a single polling batch uses it. With a numeric `ttl` (seconds) the snapshot is
+    refetched on the first `get()` after it goes stale, for long-running processes.
+    Failed fetches are not cached, so the next `get()` retries. `refresh()` swaps in
+    a new snapshot without ever leaving readers without one, for background refreshers.
+    """
+
+    def __init__(self, fetch, ttl=None, clock=time.monotonic):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._clock = clock
+        self._snapshot = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, snapshot):
+        if snapshot is None:
+            return False
+        if self.ttl is None:
+            return True
+        return self._clock() - snapshot.fetched_at < self.ttl
+
+    def get(self):
+        """
+        Return the current snapshot, fetching a new one if there is none or it expired.
+        """
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            # Another thread may have fetched while we waited for the lock.
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            return self._store(self._fetch())
+
+    def refresh(self):
+        """
+        Fetch a new snapshot unconditionally and make it current.
+        """
+        markets = self._fetch()
+        with self._lock:
+            return self._store(markets)
+
+    def _store(self, markets):
+        self._version += 1
+        self._snapshot = MarketSnapshot(markets, self._version, self._clock())
+        return self._snapshot
+
+    def invalidate(self):
+        """
+        Drop the current snapshot so the next `get()` fetches from the contract.
+        """
+        self._snapshot = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "version": self._version}
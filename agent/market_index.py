@@ -0,0 +1,34 @@
+def normalize_description(description):
+    """
+    Normalize a market description for lookups: lowercase with runs of whitespace collapsed.
+    """
+    return " ".join(description.lower().split())
+
+
+class MarketIndex:
+    """
+    Lookup tables over one market snapshot, built in a single pass.
+
+      - by_id:          market id -> market (all markets)
+      - by_description: normalized description -> active market (first by id wins)
+
+    Per-account stakes and payouts live in the snapshot's SettlementBook.
+    """
+
+    __slots__ = ("by_id", "by_description")
+
+    def __init__(self, markets):
+        self.by_id = {}
+        self.by_description = {}
+        for m in markets:
+            self.by_id[m.get("id")] = m
+            if m.get("resolved", False):
+                continue
+            key = normalize_description(m.get("description", ""))
+            self.by_description.setdefault(key, m)
+
+    def market_by_id(self, market_id):
+        return self.by_id.get(market_id)
+
+    def market_by_description(self, description):
+        return self.by_description.get(normalize_description(description))
@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+# Twitter allows 5-100 results per mentions page.
+MENTIONS_PAGE_SIZE = 100
+# Without a cursor only this many of the newest mentions are read.
+BOOTSTRAP_PAGE_SIZE = 10
+
+
+def read_since_id(path):
+    """
+    Return the persisted high-water mark (newest handled tweet id), or None if unset.
+    """
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return value or None
+
+
+def write_since_id(path, tweet_id):
+    """
+    Atomically persist the high-water mark: write a temp file next to `path`,
+    fsync it, then rename it over the old one so a crash never leaves a torn cursor.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".last_tweet_id.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(str(tweet_id))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def iter_new_mentions(client, user_id, since_id, page_size=MENTIONS_PAGE_SIZE):
+    """
+    Yield every mention newer than `since_id`, oldest first.
+
+    The API returns pages newest first, so all pages are walked with
+    `pagination_token` before the first tweet is yielded; the caller can then
+    advance the cursor after each tweet it handles. Without a `since_id` only the
+    newest page is read, so a fresh deployment does not answer its whole history.
+    """
+    if since_id is None:
+        page_size = BOOTSTRAP_PAGE_SIZE
+    tweets = []
+    pagination_token = None
+    while True:
+        response = client.get_users_mentions(
+            user_id,
+            since_id=since_id,
+            pagination_token=pagination_token,
+            max_results=page_size,
+        )
+        if response.data:
+            tweets.extend(response.data)
+        pagination_token = (response.meta or {}).get("next_token")
+        if not pagination_token or since_id is None:
+            break
+
+    tweets.sort(key=lambda t: int(t.id))
+    for tweet in tweets:
+        yield tweet
@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class RenderedReplyCache:
+    """
+    Rendered reply texts keyed by (command, normalized args, snapshot version).
+
+    A reply that only depends on the market snapshot is rendered once per snapshot
+    and reused for every tweet asking the same thing. Concurrent requests for a key
+    that is still being rendered wait for that render instead of starting their own
+    (single flight), so a burst of identical commands costs one computation.
+
+    Only the newest snapshot version is kept: the first key with a higher version
+    drops every older entry. Keys for an older version (e.g. the empty snapshot
+    returned after a failed fetch) are rendered without caching. At most
+    `max_entries` replies are kept, least recently used first out.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_render(self, command, args, version, render):
+        """
+        Return the cached reply for (command, args, version), calling `render()` on a miss.
+        """
+        key = (command, args)
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._entries.clear()
+                self._version = version
+            if version < self._version:
+                self.misses += 1
+                future = owner = None
+            else:
+                future = self._entries.get(key)
+                if future is None:
+                    self.misses += 1
+                    future = owner = self._entries[key] = Future()
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                else:
+                    owner = None
+                    self._entries.move_to_end(key)
+                    if future.done():
+                        self.hits += 1
+                    else:
+                        self.coalesced += 1
+
+        if future is None:
+            return render()
+        if owner is None:
+            return future.result()
+        try:
+            message = render()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get(key) is owner:
+                    del self._entries[key]
+            owner.set_exception(e)
+            raise
+        owner.set_result(message)
+        return message
+
+    def stats(self):
+        return {"hits": self.hits, "coalesced": self.coalesced, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common.metrics import metrics
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(bearer_token=None, consumer_key=None, consumer_secret=None,
+               access_token=None, access_token_secret=None, return_type=None):
+    """
+    Return the process-wide tweepy.Client for this credential set, creating it once.
+    Each client keeps its own requests.Session, so reusing it reuses keep-alive connections.
+    tweepy is imported on first use, since it is slow to import.
+    """
+    import tweepy
+    if return_type is None:
+        return_type = tweepy.Response
+    key = (bearer_token, consumer_key, consumer_secret, access_token, access_token_secret, return_type)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = tweepy.Client(
+                bearer_token=bearer_token,
+                consumer_key=consumer_key,
+                consumer_secret=consumer_secret,
+                access_token=access_token,
+                access_token_secret=access_token_secret,
+                return_type=return_type,
+            )
+            _clients[key] = client
+        return client
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `acquire()` blocks until a token is available.
+
+    `update_from_headers()` applies Twitter's x-rate-limit-* headers: when the
+    window is exhausted, no tokens are handed out until the reset time.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def block_for(self, seconds):
+        """
+        Stop handing out tokens for `seconds` from now.
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+            self._tokens = 0.0
+
+    def update_from_headers(self, headers):
+        remaining = headers.get("x-rate-limit-remaining")
+        reset = headers.get("x-rate-limit-reset")
+        if remaining is None or reset is None:
+            return
+        if int(remaining) <= 0:
+            self.block_for(max(0.0, int(reset) - time.time()))
+
+
+class ReplyDispatcher:
+    """
+    Sends replies from a bounded worker pool, paced by a TokenBucket.
+
+    A 429 response blocks the bucket until the window named in its headers resets
+    (or an exponential, jittered backoff when no headers are present), then the
+    reply is retried up to `max_retries` times.
+    """
+
+    def __init__(self, client, bucket, workers=4, max_retries=3, base_backoff=1.0, sleep=time.sleep):
+        self.client = client
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self._sleep = sleep
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reply")
+        self._pending = []
+        self._pending_lock = threading.Lock()
+
+    def _send(self, tweet_id, message):
+        import tweepy
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                with metrics.span("reply_to_tweet"):
+                    response = self.client.create_tweet(in_reply_to_tweet_id=tweet_id, text=message)
+            except tweepy.TooManyRequests as e:
+                metrics.inc("replies_rate_limited_total")
+                headers = e.response.headers if e.response is not None else {}
+                if "x-rate-limit-reset" in headers:
+                    self.bucket.update_from_headers(headers)
+                else:
+                    self.bucket.block_for(self.base_backoff * (2 ** attempt) * (1 + random.random()))
+                print(f"Rate limited replying to tweet {tweet_id} (attempt {attempt + 1}).")
+                continue
+            # Raw requests.Response objects carry the rate-limit headers.
+            if getattr(response, "headers", None) is not None:
+                self.bucket.update_from_headers(response.headers)
+            return response
+        raise RuntimeError(f"Gave up replying to tweet {tweet_id} after {self.max_retries + 1} attempts")
+
+    def submit(self, tweet_id, message):
+        """
+        Queue a reply and return its future.
+        """
+        future = self._executor.submit(self._send, tweet_id, message)
+        with self._pending_lock:
+            self._pending.append((tweet_id, future))
+        return future
+
+    def drain(self):
+        """
+        Wait for every queued reply. Returns (sent, failed) counts; failures are printed.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        sent = failed = 0
+        for tweet_id, future in pending:
+            try:
+                future.result()
+                sent += 1
+            except Exception as e:
+                print(f"Error replying to tweet {tweet_id}:", e)
+                failed += 1
+        return sent, failed
+
+    def close(self):
+        self.drain()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,3 @@
+"""
+Synthetic-load benchmarks with in-process fakes of every external service.
+"""
@@ -0,0 +1,77 @@
+"""
+Throughput micro-benchmark for the bot's command parser (agent/commands.py).
+
+Parses a large corpus of synthetic mention texts, with the command mix from
+bench/fakes.py plus malformed variants, and reports mentions parsed per second.
+Needs no third-party packages.
+
+Usage:
+    python bench/command_parser.py --count 200000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "agent"))
+
+from bench.fakes import make_markets, make_mentions
+from commands import parse_command, CommandError
+
+MALFORMED = [
+    "@betbotx bet sport NBA NBA Team 3 win lots yes",
+    "@betbotx bet sport NBA NBA Team 3 win 1.5 maybe",
+    "@betbotx bets not/an/account",
+    "@betbotx create sport NBA NBA Team 3 win tomorrow noon",
+    "@betbotx create sport XYZ Team win 2030-01-01 12:00:00",
+    "@betbotx market",
+    "@betbotx marketz",
+    "@betbotx",
+]
+
+
+def build_corpus(count, malformed_share=0.1, seed=0):
+    rng = random.Random(seed)
+    markets = make_markets(min(count, 1000), 2, time.time_ns(), seed=seed)
+    corpus = [tweet.text for tweet in make_mentions(count, markets, seed=seed)]
+    for i in rng.sample(range(count), int(count * malformed_share)):
+        corpus[i] = rng.choice(MALFORMED)
+    return corpus
+
+
+def parse_all(corpus):
+    outcomes = Counter()
+    for text in corpus:
+        try:
+            outcomes[parse_command(text).name] += 1
+        except CommandError:
+            outcomes["rejected"] += 1
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Command parser throughput")
+    parser.add_argument("--count", type=int, default=200000, help="mention texts in the corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes over the corpus")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count)
+    outcomes = parse_all(corpus)
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        parse_all(corpus)
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(f"{len(corpus)} mentions: best {best:.3f}s, {len(corpus) / best:,.0f} mentions/s, "
+          f"{best / len(corpus) * 1e6:.2f} us/mention")
+    print("Parsed:", dict(sorted(outcomes.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+In-process stand-ins for the services the bot and oracle talk to: the
+prediction-market contract (views and oracle transactions), the NEAR RPC,
+Twitter and the Odds API / CoinGecko. Every fake counts its calls and can add a
+fixed per-call latency to approximate network round trips.
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+from common.market_spec import SPORT_MAPPING
+
+NS_PER_SECOND = 1_000_000_000
+YOCTO_PER_NEAR = 10 ** 24
+
+TEAMS_PER_LEAGUE = 30
+CRYPTO_ASSETS = [
+    "bitcoin", "ethereum", "solana", "near", "cardano", "dogecoin", "polkadot", "litecoin",
+    "chainlink", "avalanche-2", "tron", "stellar", "monero", "cosmos", "uniswap", "aptos",
+]
+BASE_PRICES = {asset: 10.0 ** (1 + i % 5) for i, asset in enumerate(CRYPTO_ASSETS)}
+
+
+def team_name(league, i):
+    return f"{league} Team {i}"
+
+
+class CallLog:
+    """
+    Thread-safe call counter shared by the fakes of one benchmark run.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name):
+        with self._lock:
+            self.counts[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+def make_markets(count, bets_per_market, end_time_ns, seed=0):
+    """
+    Generate `count` contract markets (ids from 1) in getMarket's JSON shape:
+    roughly two thirds sports markets spread over every league and team, the rest
+    crypto markets over CRYPTO_ASSETS, each with `bets_per_market` bets.
+    """
+    rng = random.Random(seed)
+    leagues = sorted(SPORT_MAPPING)
+    markets = []
+    for market_id in range(1, count + 1):
+        if market_id % 3:
+            league = leagues[market_id % len(leagues)]
+            team = team_name(league, rng.randrange(TEAMS_PER_LEAGUE))
+            condition = rng.choice(["win", "> 5", "< 10"])
+            description = f"sport {league} {team} {condition}"
+        else:
+            asset = rng.choice(CRYPTO_ASSETS)
+            operator = rng.choice([">", "<"])
+            threshold = round(BASE_PRICES[asset] * rng.uniform(0.8, 1.2), 2)
+            description = f"crypto {asset} {operator} {threshold}"
+        bets = []
+        pools = [0, 0]
+        for i in range(bets_per_market):
+            amount = rng.randrange(1, 100) * YOCTO_PER_NEAR // 10
+            outcome = rng.randrange(2)
+            pools[outcome] += amount
+            bets.append({"user": f"user{rng.randrange(count * 2)}.testnet", "amount": str(amount), "outcome": outcome})
+        markets.append({
+            "id": market_id,
+            "description": description,
+            "bets": bets,
+            "yesPool": str(pools[0]),
+            "noPool": str(pools[1]),
+            "resolved": False,
+            "outcome": 2,
+            "endTime": str(end_time_ns + market_id),
+            "settled": False,
+            "settleCursor": 0,
+        })
+    return markets
+
+
+class FakeContract:
+    """
+    The prediction-market contract's views and oracle calls over in-memory markets,
+    following contract/src/contract.ts (including inline vs chunked settlement).
+    """
+
+    INLINE_SETTLEMENT_LIMIT = 20
+    MAX_PAGE_SIZE = 100
+    MAX_SETTLE_BATCH = 100
+
+    def __init__(self, markets, calls, clock=time.time):
+        self.markets = {m["id"]: m for m in markets}
+        self.counter = max(self.markets, default=0)
+        self.calls = calls
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _summary(m):
+        return {key: m[key] for key in ("id", "description", "endTime", "yesPool", "noPool", "resolved")}
+
+    @staticmethod
+    def _market(m):
+        return dict(m, bets=list(m["bets"]))
+
+    def view(self, method_name, args):
+        self.calls.record(f"near.view.{method_name}")
+        with self._lock:
+            return getattr(self, f"_view_{method_name}")(**args)
+
+    def _view_getAllMarkets(self):
+        return [self._market(m) for m in self.markets.values()]
+
+    def _view_getMarketCounter(self):
+        return self.counter
+
+    def _view_getMarket(self, marketId):
+        m = self.markets.get(marketId)
+        return self._market(m) if m else None
+
+    def _view_getMarketsPage(self, fromId, limit):
+        start = max(1, fromId)
+        end = min(self.counter, start + min(limit, self.MAX_PAGE_SIZE) - 1)
+        return [self._market(self.markets[i]) for i in range(start, end + 1) if i in self.markets]
+
+    def _view_getActiveMarketSummaries(self):
+        return [self._summary(m) for m in self.markets.values() if not m["resolved"]]
+
+    def _view_getExpiredUnresolved(self, now):
+        cutoff = int(now)
+        return [self._summary(m) for m in self.markets.values() if not m["resolved"] and int(m["endTime"]) < cutoff]
+
+    def _view_getUnsettledMarketIds(self):
+        return [m["id"] for m in self.markets.values() if m["resolved"] and not m["settled"]]
+
+    def _view_getSettlementStatus(self, marketId):
+        m = self.markets.get(marketId)
+        if m is None:
+            return None
+        return {"resolved": m["resolved"], "settled": m["resolved"] and m["settled"],
+                "cursor": m["settleCursor"], "totalBets": len(m["bets"])}
+
+    def call(self, method_name, args):
+        """
+        Apply an oracle transaction. Raises RuntimeError with the contract's panic message.
+        """
+        self.calls.record(f"near.tx.{method_name}")
+        with self._lock:
+            return getattr(self, f"_call_{method_name}")(**args)
+
+    def _call_resolveMarketWithOutcome(self, marketId, outcomeStr):
+        m = self.markets.get(marketId)
+        if m is None:
+            raise RuntimeError("Market not found")
+        if m["resolved"]:
+            raise RuntimeError("Market already resolved")
+        if self._clock() * NS_PER_SECOND <= int(m["endTime"]):
+            raise RuntimeError("Market not yet expired")
+        m["resolved"] = True
+        m["outcome"] = 0 if outcomeStr.lower() == "yes" else 1
+        m["settleCursor"] = 0
+        m["settled"] = False
+        if len(m["bets"]) <= self.INLINE_SETTLEMENT_LIMIT:
+            self._settle_range(m, len(m["bets"]))
+
+    def _call_settleBatch(self, marketId, cursor, limit):
+        m = self.markets.get(marketId)
+        if m is None:
+            raise RuntimeError("Market not found")
+        if not m["resolved"]:
+            raise RuntimeError("Market not yet resolved")
+        if m["settled"]:
+            raise RuntimeError("Market already settled")
+        if cursor != m["settleCursor"]:
+            raise RuntimeError(f"Stale settlement cursor: expected {m['settleCursor']}")
+        if not isinstance(limit, int) or limit <= 0:
+            raise RuntimeError("Limit must be a positive integer")
+        self._settle_range(m, min(len(m["bets"]), cursor + min(limit, self.MAX_SETTLE_BATCH)))
+        return m["settleCursor"]
+
+    def _settle_range(self, m, end):
+        m["settleCursor"] = end
+        m["settled"] = end >= len(m["bets"])
+
+
+class LegacyFakeContract(FakeContract):
+    """
+    A contract deployed before the paged, bet-free and settlement views: only
+    getAllMarkets, getMarket and getMarketCounter can be viewed.
+    """
+
+    LEGACY_VIEWS = ("getAllMarkets", "getMarket", "getMarketCounter")
+
+    def view(self, method_name, args):
+        if method_name not in self.LEGACY_VIEWS:
+            self.calls.record(f"near.view.{method_name}")
+            raise RuntimeError(f"MethodResolveError(MethodNotFound): {method_name}")
+        return super().view(method_name, args)
+
+
+class FakeNearAccount:
+    """
+    Stand-in for near_api.account.Account: view_function and function_call.
+    """
+
+    def __init__(self, contract):
+        self.contract = contract
+
+    def view_function(self, contract_id, method_name, args):
+        return {"result": self.contract.view(method_name, args), "logs": []}
+
+    def function_call(self, contract_id, method_name, args, gas=None, amount=0):
+        self.contract.call(method_name, args)
+        return {"status": {"SuccessValue": ""}}
+
+
+def fake_sign(signer, receiver_id, nonce, block_hash, method_name, args, gas, amount=0):
+    """
+    Replacement for submitter.sign_function_call: FakeNearProvider reads the call back directly.
+    """
+    return (nonce, method_name, args)
+
+
+class FakeNearProvider:
+    """
+    The JsonProvider methods ResolutionSubmitter uses. Transactions are applied to
+    the FakeContract when sent and their outcome is available immediately. Records
+    when each call was sent, so time-to-resolution can be measured.
+    """
+
+    def __init__(self, contract, calls, clock=time.perf_counter):
+        self.contract = contract
+        self.calls = calls
+        self.nonce = 0
+        self.sent_at = {}
+        self._clock = clock
+        self._outcomes = {}
+        self._lock = threading.Lock()
+
+    def get_access_key(self, account_id, public_key):
+        self.calls.record("near.rpc.get_access_key")
+        return {"nonce": self.nonce}
+
+    def get_status(self):
+        self.calls.record("near.rpc.status")
+        return {"sync_info": {"latest_block_hash": "11111111111111111111111111111111"}}
+
+    def send_tx(self, signed):
+        self.calls.record("near.rpc.broadcast_tx_async")
+        nonce, method_name, args = signed
+        with self._lock:
+            if nonce <= self.nonce:
+                raise RuntimeError("InvalidNonce")
+            self.nonce = nonce
+            tx_hash = f"tx{nonce}"
+        try:
+            self.contract.call(method_name, args)
+            status = {"SuccessValue": ""}
+        except RuntimeError as e:
+            status = {"Failure": {"ActionError": {"kind": {"FunctionCallError": {
+                "ExecutionError": f"Smart contract panicked: {e}"}}}}}
+        self._outcomes[tx_hash] = {"status": status}
+        if method_name == "resolveMarketWithOutcome":
+            self.sent_at.setdefault(args["marketId"], self._clock())
+        return tx_hash
+
+    def get_tx(self, tx_hash, account_id):
+        self.calls.record("near.rpc.tx")
+        return self._outcomes[tx_hash]
+
+
+Tweet = namedtuple("Tweet", ["id", "text"])
+# Same fields as tweepy.Response.
+Response = namedtuple("Response", ["data", "includes", "errors", "meta"])
+
+
+class FakeReply:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeTwitterClient:
+    """
+    The tweepy.Client methods the bot uses: get_users_mentions (newest first,
+    paginated with next_token) and create_tweet, which records each reply.
+    """
+
+    def __init__(self, mentions, calls, clock=time.perf_counter):
+        # Newest first, like the API.
+        self.mentions = sorted(mentions, key=lambda t: int(t.id), reverse=True)
+        self.calls = calls
+        self.replies = []
+        self.replied_at = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def get_users_mentions(self, user_id, since_id=None, pagination_token=None, max_results=10, **kwargs):
+        self.calls.record("twitter.get_users_mentions")
+        newer = [t for t in self.mentions if since_id is None or int(t.id) > int(since_id)]
+        start = int(pagination_token or 0)
+        page = newer[start:start + max_results]
+        next_token = str(start + max_results) if start + max_results < len(newer) else None
+        meta = {"result_count": len(page)}
+        if next_token:
+            meta["next_token"] = next_token
+        return Response(page or None, {}, [], meta)
+
+    def create_tweet(self, text=None, in_reply_to_tweet_id=None, **kwargs):
+        self.calls.record("twitter.create_tweet")
+        with self._lock:
+            self.replies.append((in_reply_to_tweet_id, text))
+            self.replied_at[in_reply_to_tweet_id] = self._clock()
+        return FakeReply({"x-rate-limit-remaining": "100000", "x-rate-limit-reset": str(int(time.time()) + 900)})
+
+
+def make_mentions(count, markets, first_id=1_800_000_000_000_000_000, seed=0):
+    """
+    Generate `count` mentions with a realistic command mix over `markets`.
+    """
+    rng = random.Random(seed)
+    mentions = []
+    for i in range(count):
+        market = rng.choice(markets) if markets else {"description": "sport NBA NBA Team 1 win", "bets": []}
+        roll = rng.random()
+        if roll < 0.40:
+            text = f"@betbotx bet {market['description']} {rng.randrange(1, 20) / 10} {rng.choice(['yes', 'no'])}"
+        elif roll < 0.60:
+            text = f"@betbotx market {market['description']}"
+        elif roll < 0.75:
+            user = market["bets"][0]["user"] if market["bets"] else "nobody.testnet"
+            text = f"@betbotx bets {user}"
+        elif roll < 0.85:
+            text = "@betbotx markets"
+        elif roll < 0.95:
+            text = f"@betbotx create sport NBA {team_name('NBA', rng.randrange(TEAMS_PER_LEAGUE))} &gt; 5 2030-01-01 12:00:00"
+        else:
+            text = "@betbotx hello there"
+        mentions.append(Tweet(str(first_id + i), text))
+    return mentions
+
+
+class FakeHttpResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.text = json.dumps(body)
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeHttpSession:
+    """
+    requests.Session stand-in serving Odds API scores and CoinGecko prices. Every
+    team of every league played one completed match.
+    """
+
+    def __init__(self, calls, seed=0):
+        self.calls = calls
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        leagues = {sport_id: league for league, sport_id in SPORT_MAPPING.items()}
+        self.scores = {sport_id: self._league_scores(league) for sport_id, league in leagues.items()}
+
+    def _league_scores(self, league):
+        matches = []
+        for i in range(0, TEAMS_PER_LEAGUE, 2):
+            home, away = team_name(league, i), team_name(league, i + 1)
+            matches.append({
+                "id": f"{league}-{i}",
+                "sport_key": league,
+                "commence_time": "2025-03-01T00:00:00Z",
+                "completed": True,
+                "home_team": home,
+                "away_team": away,
+                "scores": [
+                    {"name": home, "score": str(self._rng.randrange(80, 130))},
+                    {"name": away, "score": str(self._rng.randrange(80, 130))},
+                ],
+                "last_update": "2025-03-01T03:00:00Z",
+            })
+        return matches
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, timeout=None, headers=None):
+        parts = urlsplit(url)
+        self.calls.record(f"http.{parts.netloc}")
+        if parts.netloc == "api.the-odds-api.com":
+            sport_id = parts.path.split("/")[3]
+            return FakeHttpResponse(200, self.scores.get(sport_id, []))
+        if parts.netloc == "api.coingecko.com":
+            query = parse_qs(parts.query)
+            ids = query.get("ids", [""])[0].split(",")
+            now = int(time.time())
+            with self._lock:
+                body = {
+                    asset_id: {"usd": round(BASE_PRICES[asset_id] * self._rng.uniform(0.8, 1.2), 2), "last_updated_at": now}
+                    for asset_id in ids if asset_id in BASE_PRICES
+                }
+            return FakeHttpResponse(200, body)
+        return FakeHttpResponse(404, {"error": "not found"})
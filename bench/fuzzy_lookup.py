@@ -0,0 +1,155 @@
+"""
+Latency and accuracy benchmark for the bot's fuzzy market lookup (agent/fuzzy_index.py).
+
+Indexes synthetic active markets with made-up team names (fakes.py's numbered
+teams would make every description look alike), then looks up descriptions with
+one typo in a word (dropped, doubled, swapped or replaced letter) and with
+collapsed or repeated whitespace. Reports per-lookup latency, how often the
+original market is the confident match the bot would use, how often a wrong
+market would be, and the cost of an incremental sync. Then checks real team
+names: near misses (another team of the same city) must never be a confident
+match, real typos must be. Needs no third-party packages.
+
+Usage:
+    python bench/fuzzy_lookup.py --markets 100000 --queries 2000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "agent"))
+
+from bench.fakes import CRYPTO_ASSETS
+from bench.run import percentile
+from common.market_spec import SPORT_MAPPING
+from fuzzy_index import FuzzyMarketIndex
+
+# The bot's defaults (FUZZY_MIN_SCORE, FUZZY_MIN_MARGIN).
+MIN_SCORE = 0.7
+MIN_MARGIN = 0.1
+
+# (active market, query): real team names that differ from an indexed market's
+# team only in the words that matter. None of them may be a confident match.
+NEAR_MISSES = [
+    ("sport NBA Los Angeles Clippers win", "sport NBA Los Angeles Lakers win"),
+    ("sport NBA New York Nets win", "sport NBA New York Knicks win"),
+    ("sport MLB New York Mets win", "sport MLB New York Yankees win"),
+    ("sport MLB Los Angeles Angels win", "sport MLB Los Angeles Dodgers win"),
+    ("sport MLB Chicago Cubs win", "sport MLB Chicago White Sox win"),
+    ("sport EPL Manchester City win", "sport EPL Manchester United win"),
+    ("sport NBA Golden State Warriors win", "sport NBA Golden State Valkyries win"),
+    ("sport NBA Miami Heat win", "sport NBA Miami Hurricanes win"),
+    ("sport MLS LA Galaxy win", "sport MLS LAFC win"),
+    ("sport NBA Brooklyn Nets win", "sport NBA Nets win"),
+]
+# (active market, query): real typos that must be a confident match.
+TYPOS = [
+    ("sport NBA Dallas Mavericks win", "sport NBA Dallas Mavricks win"),
+    ("sport NBA Boston Celtics > 100", "sport NBA Boston Celitcs > 100"),
+    ("sport NBA Philadelphia 76ers win", "sport NBA Philadelpha 76ers win"),
+    ("sport EPL Tottenham Hotspur win", "sport  EPL tottenham hotpsur win"),
+]
+
+
+def make_word(rng):
+    consonants, vowels = "bcdfghklmnprstvwz", "aeiou"
+    return "".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randrange(2, 5)))
+
+
+def make_descriptions(count, teams_per_league=30, seed=0):
+    rng = random.Random(seed)
+    teams = {league: [f"{make_word(rng).title()} {make_word(rng).title()}" for _ in range(teams_per_league)]
+             for league in SPORT_MAPPING}
+    descriptions = []
+    for _ in range(count):
+        if rng.random() < 2 / 3:
+            league = rng.choice(sorted(teams))
+            condition = rng.choice(["win", f"> {rng.randrange(1, 150)}", f"< {rng.randrange(1, 150)}"])
+            descriptions.append(f"sport {league} {rng.choice(teams[league])} {condition}")
+        else:
+            descriptions.append(f"crypto {rng.choice(CRYPTO_ASSETS)} {rng.choice('<>')} {rng.randrange(1, 100000)}")
+    return descriptions
+
+
+def misspell(description, rng):
+    tokens = description.split()
+    words = [i for i, token in enumerate(tokens[2:], 2) if token.isalpha() and len(token) > 3]
+    if not words:
+        return "  ".join(tokens)
+    i = rng.choice(words)
+    word, at = tokens[i], rng.randrange(1, len(tokens[i]) - 1)
+    edit = rng.randrange(4)
+    if edit == 0:
+        word = word[:at] + word[at + 1:]
+    elif edit == 1:
+        word = word[:at] + word[at] + word[at:]
+    elif edit == 2:
+        word = word[:at - 1] + word[at] + word[at - 1] + word[at + 1:]
+    else:
+        word = word[:at] + rng.choice(string.ascii_lowercase) + word[at + 1:]
+    tokens[i] = word
+    return rng.choice([" ", "  "]).join(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy market lookup benchmark")
+    parser.add_argument("--markets", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    markets = [{"id": i, "description": d} for i, d in enumerate(make_descriptions(args.markets), 1)]
+    index = FuzzyMarketIndex()
+    started = time.perf_counter()
+    index.sync(1, markets)
+    print(f"{args.markets} markets ({len(index)} indexed), full build {time.perf_counter() - started:.2f}s")
+
+    # A typical refresh: 1% of the markets resolved, as many new ones created,
+    # plus the real team names checked at the end.
+    churned = markets[args.markets // 100:] + [{"id": args.markets + m["id"], "description": m["description"]}
+                                                for m in markets[:args.markets // 100]]
+    churned += [{"id": 2 * args.markets + i, "description": d}
+                for i, d in enumerate(sorted({market for market, _ in NEAR_MISSES + TYPOS}), 1)]
+    started = time.perf_counter()
+    added, removed = index.sync(2, churned)
+    print(f"incremental sync (+{added} -{removed}) {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    by_id = {m["id"]: m["description"].lower() for m in churned}
+    latencies = []
+    matched = wrong = 0
+    for market in rng.sample(churned[:args.markets], args.queries):
+        query = misspell(market["description"], rng)
+        started = time.perf_counter()
+        market_id, _ = index.match(query, MIN_SCORE, MIN_MARGIN)
+        latencies.append(time.perf_counter() - started)
+        if market_id is None:
+            continue
+        if by_id[market_id] == market["description"].lower():
+            matched += 1
+        else:
+            wrong += 1
+
+    print(f"{args.queries} misspelled lookups: p50 {percentile(latencies, 50) * 1000:.3f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.3f} ms")
+    print(f"confident and correct {matched / args.queries:.1%}, confident and wrong {wrong / args.queries:.1%}, "
+          f"not confident {(args.queries - matched - wrong) / args.queries:.1%}")
+
+    failures = 0
+    for cases, expect_match in ((NEAR_MISSES, False), (TYPOS, True)):
+        for market, query in cases:
+            market_id, best = index.match(query, MIN_SCORE, MIN_MARGIN)
+            matched_market = by_id[market_id] if market_id is not None else None
+            expected = market.lower() if expect_match else None
+            if matched_market != expected:
+                failures += 1
+                print(f"  {query!r} -> {matched_market!r} (best {best})")
+    print(f"{len(NEAR_MISSES)} near misses and {len(TYPOS)} real typos: {failures} wrong")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Synthetic-load benchmarks for the bot and the oracle.
+
+Each scenario runs `process_mentions` or `process_expired_markets` end to end
+against the in-process fakes in bench/fakes.py, in a fresh subprocess so peak RSS
+is per scenario. Reported per run:
+
+  - throughput: mentions (bot) or expired markets (oracle) per second
+  - p50/p99:    bot - time to handle one mention;
+                oracle - time from the start of the run until a market's
+                resolution transaction is broadcast
+  - calls:      NEAR views/transactions/RPC, Twitter and HTTP requests
+  - peak RSS of the benchmark process
+
+Usage:
+    python bench/run.py --scales 10,100,1000,10000,100000 --mentions 500 --bets 5
+    python bench/run.py --targets oracle --latency-ms 5 --json results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+
+DAY_NS = 86400 * 1_000_000_000
+# Expired markets ended this long ago: recently enough that crypto markets, with
+# no price history here, may still resolve at the current price.
+EXPIRED_AGO_NS = 60 * 1_000_000_000
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of `values`, or None if empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def configure_environment(workdir):
+    """
+    Settings the bot and oracle read at import time, pointing all local state into `workdir`.
+    """
+    import base58
+    os.environ.update({
+        "CONTRACT_ID": "bench.testnet",
+        "ORACLE_ACCOUNT_ID": "oracle.bench.testnet",
+        "ORACLE_PRIVATE_KEY": "ed25519:" + base58.b58encode(bytes(range(64))).decode(),
+        "ODDS_API_KEY": "bench",
+        "TWITTER_USER_ID": "1",
+        "WEB_APP_BASE_URL": "https://example.com",
+        "LAST_TWEET_ID_FILE": os.path.join(workdir, "last_tweet_id.txt"),
+        "MARKET_MIRROR_PATH": os.path.join(workdir, "market_mirror.sqlite3"),
+        "RESPONSE_CACHE_PATH": os.path.join(workdir, "responses.sqlite3"),
+        "LEASE_DB_PATH": os.path.join(workdir, "leases.sqlite3"),
+        "PRICE_HISTORY_DIR": os.path.join(workdir, "prices"),
+    })
+
+
+def bench_bot(args, workdir):
+    from bench.fakes import CallLog, FakeContract, FakeNearAccount, FakeTwitterClient, make_markets, make_mentions
+    sys.path.insert(0, os.path.join(REPO_ROOT, "agent"))
+    import bot
+    from mention_cursor import write_since_id
+    from twitter_client import ReplyDispatcher, TokenBucket
+
+    calls = CallLog(args.latency_ms / 1000)
+    markets = make_markets(args.markets, args.bets, time.time_ns() + 30 * DAY_NS)
+    mentions = make_mentions(args.mentions, markets)
+    twitter = FakeTwitterClient(mentions, calls)
+    bot.context.near_account = FakeNearAccount(FakeContract(markets, calls))
+    bot.get_client = lambda **kwargs: twitter
+    bot.context.reply_dispatcher = ReplyDispatcher(twitter, TokenBucket(1e9, 10 ** 9), workers=bot.REPLY_WORKERS)
+    write_since_id(bot.LAST_TWEET_ID_FILE, int(mentions[0].id) - 1)
+
+    latencies = []
+    handle_mention = bot.handle_mention
+
+    def timed_handle_mention(tweet):
+        started = time.perf_counter()
+        try:
+            handle_mention(tweet)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    bot.handle_mention = timed_handle_mention
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        started = time.perf_counter()
+        bot.process_mentions()
+        elapsed = time.perf_counter() - started
+    bot.context.reply_dispatcher.close()
+    return {
+        "items": len(latencies),
+        "replies": len(twitter.replies),
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "calls": dict(calls.counts),
+    }
+
+
+def bench_oracle(args, workdir):
+    from bench.fakes import CallLog, FakeContract, FakeHttpSession, FakeNearAccount, FakeNearProvider, fake_sign, make_markets
+    sys.path.insert(0, os.path.join(REPO_ROOT, "oracle"))
+    import resolver
+    from submitter import ResolutionSubmitter
+
+    calls = CallLog(args.latency_ms / 1000)
+    contract = FakeContract(make_markets(args.markets, args.bets, time.time_ns() - EXPIRED_AGO_NS), calls)
+    provider = FakeNearProvider(contract, calls)
+    resolver.context.oracle_account = FakeNearAccount(contract)
+    resolver.context.submitter = ResolutionSubmitter(provider, resolver.context.signer, resolver.CONTRACT_ID,
+                                                     resolver.RESOLVE_GAS, poll_interval=0, sign=fake_sign)
+    resolver.context.http_client.session = FakeHttpSession(calls)
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        started = time.perf_counter()
+        resolver.process_expired_markets()
+        elapsed = time.perf_counter() - started
+    resolved = sum(1 for m in contract.markets.values() if m["resolved"])
+    return {
+        "items": args.markets,
+        "resolved": resolved,
+        "settled": sum(1 for m in contract.markets.values() if m["resolved"] and m["settled"]),
+        "elapsed": elapsed,
+        "latencies": [sent_at - started for sent_at in provider.sent_at.values()],
+        "calls": dict(calls.counts),
+    }
+
+
+TARGETS = {"bot": bench_bot, "oracle": bench_oracle}
+
+
+def run_child(args):
+    """
+    Run one scenario in this process and write its result as JSON to args.result.
+    """
+    with tempfile.TemporaryDirectory(prefix="betbotx-bench-") as workdir:
+        configure_environment(workdir)
+        result = TARGETS[args.child](args, workdir)
+    latencies = result.pop("latencies")
+    result.update({
+        "target": args.child,
+        "markets": args.markets,
+        "bets_per_market": args.bets,
+        "throughput": result["items"] / result["elapsed"] if result["elapsed"] else None,
+        "p50_ms": (percentile(latencies, 50) or 0) * 1000,
+        "p99_ms": (percentile(latencies, 99) or 0) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    with open(args.result, "w") as f:
+        json.dump(result, f)
+
+
+def call_totals(calls):
+    totals = {}
+    for name, count in calls.items():
+        group = ".".join(name.split(".")[:2]) if name.startswith("near.") else name.split(".")[0]
+        totals[group] = totals.get(group, 0) + count
+    return totals
+
+
+def print_row(result):
+    totals = call_totals(result["calls"])
+    print(f"{result['target']:<7}{result['markets']:>9}{result['items']:>9}{result['elapsed']:>10.2f}"
+          f"{result['throughput']:>12.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+          f"{result['peak_rss_mb']:>10.1f}  "
+          + " ".join(f"{group}={count}" for group, count in sorted(totals.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BetBotX synthetic-load benchmarks")
+    parser.add_argument("--targets", default="bot,oracle", help="comma-separated: bot, oracle")
+    parser.add_argument("--scales", default="10,100,1000,10000,100000", help="comma-separated market counts")
+    parser.add_argument("--bets", type=int, default=5, help="bets per market")
+    parser.add_argument("--mentions", type=int, default=500, help="mentions per bot run")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated latency of every backend call")
+    parser.add_argument("--json", help="also write all results to this file")
+    parser.add_argument("--child", choices=sorted(TARGETS), help=argparse.SUPPRESS)
+    parser.add_argument("--markets", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    print(f"{'target':<7}{'markets':>9}{'items':>9}{'seconds':>10}{'items/s':>12}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'RSS MB':>10}  calls")
+    results = []
+    for target in args.targets.split(","):
+        for scale in (int(s) for s in args.scales.split(",")):
+            fd, result_path = tempfile.mkstemp(suffix=".json")
+            os.close(fd)
+            try:
+                subprocess.run([
+                    sys.executable, os.path.abspath(__file__), "--child", target, "--markets", str(scale),
+                    "--bets", str(args.bets), "--mentions", str(args.mentions),
+                    "--latency-ms", str(args.latency_ms), "--result", result_path,
+                ], check=True)
+                with open(result_path) as f:
+                    result = json.load(f)
+            except subprocess.CalledProcessError as e:
+                print(f"{target} at {scale} markets failed with exit code {e.returncode}")
+                continue
+            finally:
+                os.unlink(result_path)
+            results.append(result)
+            print_row(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
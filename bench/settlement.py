@@ -0,0 +1,99 @@
+"""
+Throughput benchmark and cross-check for the settlement engine (common/settlement.py).
+
+Builds a SettlementBook over synthetic markets with odd yoctoNEAR amounts (so the
+contract's rounding down matters), checks its payouts against a bet-by-bet
+transcription of the contract's settleRange, then times loading the book,
+computing both payout columns, per-account positions and the obligation of
+resolving every market. Needs no third-party packages.
+
+Usage:
+    python bench/settlement.py --markets 10000 --bets 100 --check 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+
+from bench.fakes import make_markets
+from common.settlement import SettlementBook, YES, NO, bet_payout, format_near
+
+
+def make_book_markets(count, bets_per_market, seed=0):
+    rng = random.Random(seed)
+    markets = make_markets(count, bets_per_market, time.time_ns(), seed=seed)
+    for market in markets:
+        pools = [0, 0]
+        for bet in market["bets"]:
+            amount = int(bet["amount"]) + rng.randrange(10 ** 18)
+            bet["amount"] = str(amount)
+            pools[bet["outcome"]] += amount
+        # Some markets have nobody on one side, which turns into refunds.
+        if rng.random() < 0.05:
+            side = rng.randrange(2)
+            market["bets"] = [bet for bet in market["bets"] if bet["outcome"] != side]
+            pools[side] = 0
+        market["yesPool"], market["noPool"] = str(pools[YES]), str(pools[NO])
+    return markets
+
+
+def settle_range(market, outcome):
+    """
+    The contract's settleRange over all bets of `market`, one bet at a time.
+    """
+    yes, no = int(market["yesPool"]), int(market["noPool"])
+    winning, losing = (yes, no) if outcome == YES else (no, yes)
+    owed = {}
+    for bet in market["bets"]:
+        amount = bet_payout(int(bet["amount"]), bet["outcome"], outcome, winning, losing)
+        if amount > 0:
+            owed[bet["user"]] = owed.get(bet["user"], 0) + amount
+    return owed
+
+
+def check(book, markets):
+    for market in markets:
+        for outcome in (YES, NO):
+            expected = settle_range(market, outcome)
+            actual = book.payouts(market["id"], outcome)
+            if actual != expected:
+                raise AssertionError(f"market {market['id']} outcome {outcome}: {actual} != {expected}")
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<28}{time.perf_counter() - started:>10.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Settlement engine throughput")
+    parser.add_argument("--markets", type=int, default=10000)
+    parser.add_argument("--bets", type=int, default=100, help="bets per market")
+    parser.add_argument("--check", type=int, default=500, help="markets cross-checked against settleRange")
+    args = parser.parse_args()
+
+    markets = make_book_markets(args.markets, args.bets)
+    bets = sum(len(m["bets"]) for m in markets)
+    print(f"{args.markets} markets, {bets} bets")
+
+    book = timed("load", lambda: SettlementBook(markets))
+    timed("payout columns", lambda: (book.payout_column(YES), book.payout_column(NO)))
+    timed(f"positions of {min(1000, len(book.accounts))} accounts",
+          lambda: [book.positions(account) for account in book.accounts[:1000]])
+    timed("odds", book.all_odds)
+    resolutions = [(m["id"], random.Random(m["id"]).choice(["yes", "no"])) for m in markets]
+    total = timed("obligation", lambda: book.obligation(resolutions))
+    print(f"Obligation of resolving every market: {format_near(total)} NEAR")
+
+    timed(f"check {min(args.check, len(markets))} markets", lambda: check(book, markets[:args.check]))
+    print("Payouts match settleRange.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Code shared by the Twitter agent (agent/) and the oracle (oracle/).
+"""
@@ -0,0 +1,90 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AppContext:
+    """
+    Lazily built clients and settings for one bot or oracle process.
+
+    Register a factory per resource with `provide(name, factory)`; the resource is
+    built on first access (`context.name`) and cached. Assigning `context.name`
+    directly replaces it, which is how benchmarks and tests swap in fakes.
+    Required environment variables are only checked by `validate()`, so importing
+    a module that owns a context needs no secrets.
+
+    Heavy imports (`import_module`) and factory calls are timed, and
+    `startup_report()` lists where startup time went. Times are inclusive: a
+    factory that builds another resource also counts that resource's time.
+    """
+
+    def __init__(self, required=()):
+        self._required = tuple(required)
+        self._factories = {}
+        self._lock = threading.RLock()
+        self.timings = []
+
+    def provide(self, name, factory):
+        self._factories[name] = factory
+
+    def __getattr__(self, name):
+        # Only reached when `name` has not been built or assigned yet.
+        factories = object.__getattribute__(self, "_factories")
+        if name not in factories:
+            raise AttributeError(name)
+        with self._lock:
+            if name in self.__dict__:
+                return self.__dict__[name]
+            with self.timed(name):
+                value = factories[name]()
+            self.__dict__[name] = value
+            return value
+
+    def reset(self, *names):
+        """
+        Drop built resources so they are rebuilt on next access.
+        """
+        with self._lock:
+            for name in names or list(self._factories):
+                self.__dict__.pop(name, None)
+
+    def validate(self):
+        """
+        Raise ValueError if any required environment variable is unset.
+        """
+        missing = [name for name in self._required if not os.getenv(name)]
+        if missing:
+            raise ValueError("Missing one or more required environment variables: " + ", ".join(missing))
+
+    def import_module(self, name):
+        """
+        Import (once) and return a module, recording how long the first import took.
+        """
+        module = sys.modules.get(name)
+        if module is None:
+            with self.timed(f"import {name}"):
+                module = importlib.import_module(name)
+        return module
+
+    @contextmanager
+    def timed(self, label):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((label, time.perf_counter() - started))
+
+    def record(self, label, seconds):
+        self.timings.append((label, seconds))
+
+    def startup_report(self):
+        """
+        Human-readable list of timed startup steps, slowest first.
+        """
+        lines = ["Startup profile:"]
+        for label, seconds in sorted(self.timings, key=lambda item: -item[1]):
+            lines.append(f"  {seconds * 1000:9.2f} ms  {label}")
+        return "\n".join(lines)
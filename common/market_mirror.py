@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+# Default location of the bot's mirror.
+DEFAULT_MIRROR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "market_mirror.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS markets (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    yes_pool TEXT NOT NULL,
+    no_pool TEXT NOT NULL,
+    resolved INTEGER NOT NULL,
+    outcome INTEGER NOT NULL,
+    bets TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS markets_unresolved ON markets (resolved, end_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _row_to_market(row):
+    market_id, description, end_time, yes_pool, no_pool, resolved, outcome, bets = row
+    return {
+        "id": market_id,
+        "description": description,
+        "endTime": end_time,
+        "yesPool": yes_pool,
+        "noPool": no_pool,
+        "resolved": bool(resolved),
+        "outcome": outcome,
+        "bets": json.loads(bets),
+    }
+
+
+def _market_to_row(market):
+    return (
+        market["id"],
+        market.get("description", ""),
+        str(market.get("endTime", "0")),
+        str(market.get("yesPool", "0")),
+        str(market.get("noPool", "0")),
+        1 if market.get("resolved", False) else 0,
+        market.get("outcome", 2),
+        json.dumps(market.get("bets", [])),
+    )
+
+
+class MarketMirror:
+    """
+    Local SQLite copy of the contract's markets, kept up to date incrementally.
+
+    `sync()` reads getMarketCounter and pages in only ids above the stored counter
+    with getMarketsPage. It then compares getActiveMarketSummaries (pools, no bets)
+    against the local copy and refetches, with getMarket, only the markets whose
+    pools moved or that were resolved since the last sync. Resolved markets never
+    change on chain, so they are never downloaded again. Contracts deployed
+    before those views existed only have getAllMarkets; if the paged views fail,
+    every market is read with it instead. `view(method, args)` performs a
+    contract view call and returns its decoded result.
+    """
+
+    def __init__(self, view, path=DEFAULT_MIRROR_PATH, workers=8, page_size=100):
+        self._view = view
+        self.path = path
+        self.workers = workers
+        self.page_size = page_size
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # A fresh connection per operation keeps the mirror usable from any thread.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _stored_counter(self, conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'market_counter'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _fetch_pages(self, from_id, to_id):
+        markets = []
+        while from_id <= to_id:
+            page = self._view("getMarketsPage", {"fromId": from_id, "limit": self.page_size})
+            if not page:
+                break
+            markets.extend(page)
+            from_id = max(m["id"] for m in page) + 1
+        return markets
+
+    def _fetch_markets(self, market_ids):
+        def fetch(market_id):
+            return self._view("getMarket", {"marketId": market_id})
+        if not market_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(market_ids))) as executor:
+            return [m for m in executor.map(fetch, market_ids) if m]
+
+    def sync(self):
+        """
+        Bring the mirror up to date with the contract. Returns (new, refreshed) counts.
+        """
+        counter = int(self._view("getMarketCounter", {}))
+        with closing(self._connect()) as conn:
+            stored = self._stored_counter(conn)
+            local = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute("SELECT id, yes_pool, no_pool FROM markets WHERE resolved = 0")
+            }
+
+        try:
+            new_markets = self._fetch_pages(stored + 1, counter)
+            changed = []
+            if local:
+                active = {m["id"]: m for m in self._view("getActiveMarketSummaries", {})}
+                for market_id, pools in local.items():
+                    summary = active.get(market_id)
+                    if summary is None or (str(summary["yesPool"]), str(summary["noPool"])) != pools:
+                        changed.append(market_id)
+            refreshed = self._fetch_markets(changed)
+        except Exception as e:
+            print("Paged market views failed, reading getAllMarkets instead:", e)
+            markets = self._view("getAllMarkets", {})
+            new_markets = [m for m in markets if m["id"] > stored]
+            refreshed = [m for m in markets if m["id"] <= stored]
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO markets VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [_market_to_row(m) for m in new_markets + refreshed],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('market_counter', ?)",
+                (str(max(counter, stored)),),
+            )
+        return len(new_markets), len(refreshed)
+
+    def all_markets(self):
+        """
+        Every mirrored market, ordered by id, in the same shape as getAllMarkets.
+        """
+        with closing(self._connect()) as conn:
+            return [_row_to_market(row) for row in conn.execute("SELECT * FROM markets ORDER BY id")]
+
+    def unresolved_markets(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM markets WHERE resolved = 0 ORDER BY id")
+            return [_row_to_market(row) for row in rows]
+
+    def load(self):
+        """
+        Sync, then return every unresolved market; resolved ones and their bets
+        are never decoded. If the contract cannot be reached, the error is printed
+        and the last mirrored state is returned instead.
+        """
+        try:
+            new, refreshed = self.sync()
+            print(f"Market mirror synced: {new} new, {refreshed} refreshed.")
+        except Exception as e:
+            print("Error syncing market mirror, using local copy:", e)
+        return self.unresolved_markets()
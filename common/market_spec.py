@@ -0,0 +1,133 @@
+# Map league to Odds API sport ID.
+SPORT_MAPPING = {
+    "NBA": "basketball_nba",
+    "MLS": "soccer_usa_mls",
+    "MLB": "baseball_mlb",
+    "EFL": "soccer_england_efl_cup",
+    "EPL": "soccer_epl"
+}
+
+SPORT_CONDITIONS = ("win", ">", "<")
+CRYPTO_OPERATORS = (">", "<", "=")
+
+
+class InvalidMarket(ValueError):
+    """
+    Raised when a market description cannot be parsed or is not supported.
+    """
+
+
+class MarketSpec:
+    """
+    Parsed market description.
+
+    kind is "sport" or "crypto". For sports, league is the upper-cased league and
+    subject the team name; for crypto, league is None and subject the asset.
+    operator is "win", ">", "<" or "=", and threshold a float (None for "win").
+    """
+
+    __slots__ = ("kind", "league", "subject", "operator", "threshold")
+
+    def __init__(self, kind, league, subject, operator, threshold):
+        self.kind = kind
+        self.league = league
+        self.subject = subject
+        self.operator = operator
+        self.threshold = threshold
+
+    @property
+    def sport_id(self):
+        return SPORT_MAPPING.get(self.league) if self.kind == "sport" else None
+
+    @property
+    def asset(self):
+        return self.subject if self.kind == "crypto" else None
+
+    def __repr__(self):
+        return (f"MarketSpec({self.kind!r}, {self.league!r}, {self.subject!r}, "
+                f"{self.operator!r}, {self.threshold!r})")
+
+
+def _parse_threshold(token, description):
+    try:
+        return float(token)
+    except ValueError:
+        raise InvalidMarket(f"Invalid threshold '{token}' in market description: {description}")
+
+
+def _parse_sport(parts, description):
+    if len(parts) < 4:
+        raise InvalidMarket(f"Invalid sports market description: {description}")
+    league = parts[1].upper()
+    if league not in SPORT_MAPPING:
+        raise InvalidMarket(f"League not supported: {league}")
+
+    # The team name is all tokens between the league and the condition token.
+    condition_index = next((i for i in range(2, len(parts)) if parts[i].lower() in SPORT_CONDITIONS), None)
+    if condition_index is None:
+        raise InvalidMarket(f"No valid condition found in sports market description: {description}")
+    if condition_index == 2:
+        raise InvalidMarket(f"No team name found in sports market description: {description}")
+    team = " ".join(parts[2:condition_index])
+
+    condition = parts[condition_index].lower()
+    threshold = None
+    if condition != "win":
+        if len(parts) <= condition_index + 1:
+            raise InvalidMarket(f"Missing threshold in sports market description: {description}")
+        threshold = _parse_threshold(parts[condition_index + 1], description)
+    return MarketSpec("sport", league, team, condition, threshold)
+
+
+def _parse_crypto(parts, description):
+    if len(parts) < 4:
+        raise InvalidMarket(f"Description format invalid for crypto market: {description}")
+    operator = parts[2]
+    if operator not in CRYPTO_OPERATORS:
+        raise InvalidMarket(f"Unknown operator in crypto market: {operator}")
+    return MarketSpec("crypto", None, parts[1], operator, _parse_threshold(parts[3], description))
+
+
+def parse_market(description):
+    """
+    Parse a market description into a MarketSpec, raising InvalidMarket if it is not valid.
+    Expected market description formats:
+       "sport NBA Lakers win"           -> check if Lakers won
+       "sport NBA Lakers > 10"          -> check if Lakers won by more than 10 points
+       "sport NBA New York Knicks < 10" -> check if Knicks won by less than 10 points
+       "crypto ETH > 80000"             -> compare the price ("<", ">" or "=")
+    """
+    parts = description.split()
+    kind = parts[0].lower() if parts else ""
+    if kind == "sport":
+        return _parse_sport(parts, description)
+    if kind == "crypto":
+        return _parse_crypto(parts, description)
+    raise InvalidMarket(f"Unknown market type in description: {description}")
+
+
+_spec_cache = {}
+
+
+def get_market_spec(market):
+    """
+    Return the MarketSpec of a market dict, parsing each (id, description) only once
+    per process. Invalid markets raise InvalidMarket every time they are asked for.
+    """
+    key = (market.get("id"), market.get("description", ""))
+    result = _spec_cache.get(key)
+    if result is None:
+        try:
+            result = parse_market(key[1])
+        except InvalidMarket as e:
+            # Only the message is kept: a cached exception would be re-raised with
+            # a traceback that grows (and keeps its frames alive) on every call.
+            result = str(e)
+        _spec_cache[key] = result
+    if isinstance(result, str):
+        raise InvalidMarket(result)
+    return result
+
+
+def clear_spec_cache():
+    _spec_cache.clear()
@@ -0,0 +1,229 @@
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Upper bounds (seconds) of the span histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+
+class _Span:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe("span_seconds", time.perf_counter() - self.started, span=self.name)
+        if exc_type is not None:
+            self.registry.inc("span_errors_total", span=self.name)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms for one bot or oracle process.
+
+    Disabled by default: every call then returns after one attribute check, so
+    instrumented hot paths cost next to nothing. Once enabled, `span(name)` and
+    `@timed(name)` record durations into the `span_seconds` histogram (plus
+    `span_errors_total` when the block raises). The registry is exported either
+    as Prometheus text (e.g. for node_exporter's textfile collector) or as a JSON
+    run report.
+    """
+
+    def __init__(self, namespace="betbotx", buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.enabled = False
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def span(self, name):
+        """
+        Context manager timing the enclosed block.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """
+        Decorator timing every call of the wrapped function as span `name`.
+        """
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def to_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({name for name, _ in series}):
+                    full = f"{self.namespace}_{name}"
+                    lines.append(f"# TYPE {full} {kind}")
+                    for (series_name, labels), value in sorted(series.items()):
+                        if series_name == name:
+                            lines.append(f"{full}{_format_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self._histograms}):
+                full = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full} histogram")
+                for (series_name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_report(self):
+        """
+        JSON-serializable run report: every series with its labels, and count,
+        total, mean and max for histograms.
+        """
+        def entries(series, render):
+            report = {}
+            for (name, labels), value in sorted(series.items(), key=lambda item: item[0]):
+                report.setdefault(name, []).append(dict(labels=dict(labels), **render(value)))
+            return report
+
+        with self._lock:
+            return {
+                "counters": entries(self._counters, lambda value: {"value": value}),
+                "gauges": entries(self._gauges, lambda value: {"value": value}),
+                "histograms": entries(self._histograms, lambda h: {
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "mean": round(h.sum / h.count, 6) if h.count else 0.0,
+                    "max": round(h.max, 6),
+                }),
+            }
+
+    def write_report(self, path):
+        """
+        Atomically write the metrics to `path`: a JSON run report if it ends in
+        .json, Prometheus text otherwise. Does nothing while disabled.
+        """
+        if not self.enabled or not path:
+            return
+        if path.endswith(".json"):
+            content = json.dumps(dict(self.to_report(), written_at=time.time()), indent=2)
+        else:
+            content = self.to_prometheus()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+# Process-wide registry used by the bot and the oracle.
+metrics = MetricsRegistry()
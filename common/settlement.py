@@ -0,0 +1,232 @@
+from array import array
+from fractions import Fraction
+
+# Outcome codes as stored by the contract (Outcome enum).
+YES, NO = 0, 1
+OUTCOME_CODES = {"yes": YES, "no": NO}
+YOCTO_PER_NEAR = 10 ** 24
+
+
+def outcome_code(outcome):
+    """
+    Contract outcome code for "yes"/"no" (any case) or an already numeric code.
+    """
+    if isinstance(outcome, str):
+        return OUTCOME_CODES[outcome.lower()]
+    if outcome not in (YES, NO):
+        raise ValueError(f"Invalid outcome: {outcome}")
+    return outcome
+
+
+def format_near(yocto):
+    """
+    Exact decimal NEAR amount for an integer yoctoNEAR amount, without trailing zeros.
+    """
+    whole, fraction = divmod(int(yocto), YOCTO_PER_NEAR)
+    if not fraction:
+        return str(whole)
+    return f"{whole}.{fraction:024d}".rstrip("0")
+
+
+def bet_payout(amount, bet_outcome, outcome, winning_pool, losing_pool):
+    """
+    What the contract transfers for one bet when its market resolves to `outcome`
+    (settleRange): everyone is refunded if nobody backed the winning side, winners
+    get their stake plus a floored share of the losing pool, losers get nothing.
+    """
+    if winning_pool == 0:
+        return amount
+    if bet_outcome == outcome:
+        return amount + amount * losing_pool // winning_pool
+    return 0
+
+
+class Position:
+    """
+    One account's stake in one market and what it would be paid for each outcome.
+    """
+
+    __slots__ = ("market", "staked_yes", "staked_no", "payout_yes", "payout_no")
+
+    def __init__(self, market):
+        self.market = market
+        self.staked_yes = self.staked_no = self.payout_yes = self.payout_no = 0
+
+
+class MarketOdds:
+    """
+    Pool-implied odds of one market: the probability of each outcome is its share
+    of both pools, and the multiplier is what a winning stake returns per unit
+    (before the per-bet rounding down). None where a pool is empty.
+    """
+
+    __slots__ = ("yes_probability", "no_probability", "yes_multiplier", "no_multiplier")
+
+    def __init__(self, yes_pool, no_pool):
+        total = yes_pool + no_pool
+        self.yes_probability = Fraction(yes_pool, total) if total else None
+        self.no_probability = Fraction(no_pool, total) if total else None
+        self.yes_multiplier = Fraction(total, yes_pool) if yes_pool else None
+        self.no_multiplier = Fraction(total, no_pool) if no_pool else None
+
+
+class SettlementBook:
+    """
+    Every bet of a set of markets in columns, for previewing settlement in bulk.
+
+    Bets are stored market by market: market row r owns bets
+    [bet_start[r], bet_start[r + 1]). Per bet there is an account number (index
+    into `accounts`), an outcome code and an amount in yoctoNEAR. Small-integer
+    columns are arrays; amounts and pools stay Python ints because yoctoNEAR
+    values overflow 64-bit integers, which keeps every result exactly equal to the
+    contract's BigInt arithmetic.
+
+    Pools are taken from the markets' yesPool/noPool, which is what the contract
+    divides by, and only summed from the bets when a market has none.
+
+    Payout columns (what each bet is paid if every market resolved to one
+    outcome) are computed on first use, once per outcome, and shared by all
+    account, market and obligation queries.
+    """
+
+    def __init__(self, markets):
+        self.markets = []
+        self.rows = {}
+        self.yes_pool = []
+        self.no_pool = []
+        self.bet_start = array("q", [0])
+        self.bet_market = array("l")
+        self.bet_account = array("l")
+        self.bet_outcome = array("b")
+        self.bet_amount = []
+        self.accounts = []
+        self._account_numbers = {}
+        self._account_bets = {}
+        self._payouts = {}
+
+        for market in markets:
+            row = len(self.markets)
+            self.rows[market["id"]] = row
+            self.markets.append(market)
+            yes = no = 0
+            for bet in market.get("bets", []):
+                user = bet["user"]
+                number = self._account_numbers.get(user)
+                if number is None:
+                    number = self._account_numbers[user] = len(self.accounts)
+                    self.accounts.append(user)
+                    self._account_bets[number] = array("l")
+                amount = int(bet["amount"])
+                outcome = bet["outcome"]
+                self._account_bets[number].append(len(self.bet_amount))
+                self.bet_market.append(row)
+                self.bet_account.append(number)
+                self.bet_outcome.append(outcome)
+                self.bet_amount.append(amount)
+                if outcome == YES:
+                    yes += amount
+                else:
+                    no += amount
+            self.yes_pool.append(int(market["yesPool"]) if market.get("yesPool") is not None else yes)
+            self.no_pool.append(int(market["noPool"]) if market.get("noPool") is not None else no)
+            self.bet_start.append(len(self.bet_amount))
+
+    def __len__(self):
+        return len(self.markets)
+
+    def __contains__(self, market_id):
+        return market_id in self.rows
+
+    def _pools(self, row, outcome):
+        """
+        (winning, losing) pools of market row `row` if it resolves to `outcome`.
+        """
+        if outcome == YES:
+            return self.yes_pool[row], self.no_pool[row]
+        return self.no_pool[row], self.yes_pool[row]
+
+    def payout_column(self, outcome):
+        """
+        Per-bet payouts, aligned with `bet_amount`, if every market resolves to `outcome`.
+        """
+        outcome = outcome_code(outcome)
+        column = self._payouts.get(outcome)
+        if column is not None:
+            return column
+        column = []
+        amounts, outcomes = self.bet_amount, self.bet_outcome
+        for row in range(len(self.markets)):
+            start, end = self.bet_start[row], self.bet_start[row + 1]
+            winning, losing = self._pools(row, outcome)
+            if winning == 0:
+                column.extend(amounts[start:end])
+            elif losing == 0:
+                column.extend(amount if side == outcome else 0
+                              for amount, side in zip(amounts[start:end], outcomes[start:end]))
+            else:
+                column.extend(amount + amount * losing // winning if side == outcome else 0
+                              for amount, side in zip(amounts[start:end], outcomes[start:end]))
+        self._payouts[outcome] = column
+        return column
+
+    def payouts(self, market_id, outcome):
+        """
+        Transfers the contract makes when `market_id` resolves to `outcome`:
+        account -> yoctoNEAR, summed per account as settleRange does.
+        """
+        row = self.rows[market_id]
+        column = self.payout_column(outcome)
+        owed = {}
+        for i in range(self.bet_start[row], self.bet_start[row + 1]):
+            if column[i]:
+                user = self.accounts[self.bet_account[i]]
+                owed[user] = owed.get(user, 0) + column[i]
+        return owed
+
+    def obligation(self, resolutions):
+        """
+        Total yoctoNEAR the contract transfers for (market_id, outcome) resolutions.
+        Every market must be in the book.
+        """
+        columns = {YES: None, NO: None}
+        total = 0
+        for market_id, outcome in resolutions:
+            outcome = outcome_code(outcome)
+            if columns[outcome] is None:
+                columns[outcome] = self.payout_column(outcome)
+            row = self.rows[market_id]
+            total += sum(columns[outcome][self.bet_start[row]:self.bet_start[row + 1]])
+        return total
+
+    def positions(self, account):
+        """
+        The account's Position in each market it bet on, in market order.
+        """
+        number = self._account_numbers.get(account)
+        if number is None:
+            return []
+        pay_yes, pay_no = self.payout_column(YES), self.payout_column(NO)
+        by_row = {}
+        for i in self._account_bets[number]:
+            row = self.bet_market[i]
+            position = by_row.get(row)
+            if position is None:
+                position = by_row[row] = Position(self.markets[row])
+            if self.bet_outcome[i] == YES:
+                position.staked_yes += self.bet_amount[i]
+            else:
+                position.staked_no += self.bet_amount[i]
+            position.payout_yes += pay_yes[i]
+            position.payout_no += pay_no[i]
+        return list(by_row.values())
+
+    def odds(self, market_id):
+        row = self.rows[market_id]
+        return MarketOdds(self.yes_pool[row], self.no_pool[row])
+
+    def all_odds(self):
+        """
+        market id -> MarketOdds for every market in the book.
+        """
+        return {market["id"]: MarketOdds(self.yes_pool[row], self.no_pool[row])
+                for row, market in enumerate(self.markets)}
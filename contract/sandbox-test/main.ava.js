@@ -9,6 +9,13 @@ setDefaultResultOrder('ipv4first');
  */
 const test = anyTest;
 
+const ONE_NEAR = 10n ** 24n;
+
+/** Spendable balance of `account` in yoctoNEAR. */
+async function availableBalance(account) {
+  return BigInt((await account.availableBalance()).toString());
+}
+
 test.beforeEach(async t => {
   // Initialize sandboxed NEAR environment.
   const worker = t.context.worker = await Worker.init();
@@ -117,3 +124,143 @@ test('resolveMarket distributes payouts correctly', async t => {
   t.true(marketAfter.resolved);
   t.is(marketAfter.outcome, 0); // Outcome.Yes is represented as 0.
 });
+
+test('paginated and summary views', async t => {
+  const { contract, alice } = t.context.accounts;
+  const now = BigInt(Date.now()) * BigInt(1_000_000);
+  const futureTime = (now + BigInt(100_000_000_000)).toString();
+
+  const first = await contract.call('createMarket', { description: 'Page market 1', endTime: futureTime });
+  const second = await contract.call('createMarket', { description: 'Page market 2', endTime: futureTime });
+  await contract.call('createMarket', { description: 'Page market 3', endTime: futureTime });
+
+  const deposit = '1000000000000000000000000'; // 1 NEAR
+  await alice.call(
+    contract,
+    'placeBet',
+    { marketId: second, outcomeStr: 'no' },
+    { attachedDeposit: deposit }
+  );
+
+  const page = await contract.view('getMarketsPage', { fromId: first, limit: 2 });
+  t.deepEqual(page.map(m => m.id), [first, second]);
+
+  const summaries = await contract.view('getActiveMarketSummaries', {});
+  t.is(summaries.length, 3);
+  t.is(summaries[1].noPool, deposit);
+  t.is(summaries[1].bets, undefined);
+
+  const expired = await contract.view('getExpiredUnresolved', { now: now.toString() });
+  t.is(expired.length, 0);
+
+  const bets = await contract.view('getBetsByUser', { account: alice.accountId });
+  t.is(bets.length, 1);
+  t.is(bets[0].marketId, second);
+  t.is(bets[0].amount, deposit);
+  t.is(bets[0].outcome, 1); // Outcome.No
+});
+
+test('small markets settle inline with one transfer per account', async t => {
+  const { contract, alice, bob } = t.context.accounts;
+  const now = BigInt(Date.now()) * BigInt(1_000_000);
+  const futureTime = (now + BigInt(100_000_000_000)).toString();
+  const marketId = await contract.call('createMarket', { description: 'Settlement market', endTime: futureTime });
+
+  const deposit = '1000000000000000000000000'; // 1 NEAR
+  await alice.call(contract, 'placeBet', { marketId, outcomeStr: 'yes' }, { attachedDeposit: deposit });
+  await alice.call(contract, 'placeBet', { marketId, outcomeStr: 'yes' }, { attachedDeposit: deposit });
+  await bob.call(contract, 'placeBet', { marketId, outcomeStr: 'no' }, { attachedDeposit: deposit });
+
+  const aliceBalanceBefore = await availableBalance(alice);
+  const bobBalanceBefore = await availableBalance(bob);
+
+  await t.context.worker.setBlockTimestamp(Number(BigInt(futureTime)) + 1);
+  await contract.call('resolveMarketWithOutcome', { marketId, outcomeStr: 'yes' });
+
+  const status = await contract.view('getSettlementStatus', { marketId });
+  t.true(status.resolved);
+  t.true(status.settled);
+  t.is(status.cursor, 3);
+
+  // Each of Alice's bets wins 1 + 1 * 1 / 2 NEAR, paid in one transfer of 3 NEAR.
+  t.is(await availableBalance(alice) - aliceBalanceBefore, 3n * ONE_NEAR);
+  t.is(await availableBalance(bob), bobBalanceBefore);
+
+  await t.throwsAsync(contract.call('settleBatch', { marketId, cursor: 3, limit: 10 }));
+});
+
+test('large markets settle in settleBatch calls that advance the cursor', async t => {
+  const { contract, alice, bob } = t.context.accounts;
+  const now = BigInt(Date.now()) * BigInt(1_000_000);
+  const futureTime = (now + BigInt(100_000_000_000)).toString();
+  const marketId = await contract.call('createMarket', { description: 'Chunked market', endTime: futureTime });
+
+  // 24 bets, more than INLINE_SETTLEMENT_LIMIT: every third is Bob's 2 NEAR on "no",
+  // the rest are Alice's 1 NEAR on "yes", so both pools hold 16 NEAR.
+  const betCount = 24;
+  const isBob = i => i % 3 === 2;
+  for (let i = 0; i < betCount; i++) {
+    if (isBob(i)) {
+      await bob.call(contract, 'placeBet', { marketId, outcomeStr: 'no' }, { attachedDeposit: (2n * ONE_NEAR).toString() });
+    } else {
+      await alice.call(contract, 'placeBet', { marketId, outcomeStr: 'yes' }, { attachedDeposit: ONE_NEAR.toString() });
+    }
+  }
+
+  const aliceBalanceBefore = await availableBalance(alice);
+  const bobBalanceBefore = await availableBalance(bob);
+
+  await t.context.worker.setBlockTimestamp(Number(BigInt(futureTime)) + 1);
+  await contract.call('resolveMarketWithOutcome', { marketId, outcomeStr: 'yes' });
+
+  let status = await contract.view('getSettlementStatus', { marketId });
+  t.true(status.resolved);
+  t.false(status.settled);
+  t.is(status.cursor, 0);
+  t.is(status.totalBets, betCount);
+  t.is(await availableBalance(alice), aliceBalanceBefore);
+
+  // A limit that is not a positive integer would move the cursor backwards (and
+  // pay settled bets again) or leave it between two bets.
+  for (const limit of [-5, 0, 1.5]) {
+    await t.throwsAsync(
+      contract.call('settleBatch', { marketId, cursor: 0, limit }),
+      { message: /Limit must be a positive integer/ }
+    );
+  }
+  t.is((await contract.view('getSettlementStatus', { marketId })).cursor, 0);
+  t.is(await availableBalance(alice), aliceBalanceBefore);
+
+  // Each winning bet is paid 1 + 1 * 16 / 16 = 2 NEAR.
+  const cursor = await contract.call('settleBatch', { marketId, cursor: 0, limit: 10 });
+  t.is(cursor, 10);
+  const aliceWinsInFirstBatch = [...Array(10).keys()].filter(i => !isBob(i)).length;
+  t.is(await availableBalance(alice) - aliceBalanceBefore, BigInt(aliceWinsInFirstBatch) * 2n * ONE_NEAR);
+
+  // Replaying the batch that was already applied must not pay anyone twice.
+  await t.throwsAsync(
+    contract.call('settleBatch', { marketId, cursor: 0, limit: 10 }),
+    { message: /Stale settlement cursor/ }
+  );
+  await t.throwsAsync(
+    contract.call('settleBatch', { marketId, cursor: 10, limit: -5 }),
+    { message: /Limit must be a positive integer/ }
+  );
+
+  let next = cursor;
+  for (let round = 0; !status.settled && round < betCount; round++) {
+    next = await contract.call('settleBatch', { marketId, cursor: next, limit: 10 });
+    status = await contract.view('getSettlementStatus', { marketId });
+    t.is(status.cursor, next);
+  }
+  t.is(next, betCount);
+
+  const aliceWins = [...Array(betCount).keys()].filter(i => !isBob(i)).length;
+  t.is(await availableBalance(alice) - aliceBalanceBefore, BigInt(aliceWins) * 2n * ONE_NEAR);
+  t.is(await availableBalance(bob), bobBalanceBefore);
+
+  await t.throwsAsync(
+    contract.call('settleBatch', { marketId, cursor: betCount, limit: 10 }),
+    { message: /Market already settled/ }
+  );
+});
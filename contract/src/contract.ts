@@ -29,6 +29,8 @@ export class Market {
   resolved: boolean;
   outcome: Outcome;
   endTime: bigint;  // Market expiration time
+  settled: boolean;      // All payouts/refunds sent (undefined on markets resolved before chunked settlement)
+  settleCursor: number;  // Index of the next bet to settle
 
   constructor(id: number, description: string, endTime: bigint) {
     this.id = id;
@@ -39,9 +41,76 @@ export class Market {
     this.resolved = false;
     this.outcome = Outcome.Undecided;
     this.endTime = endTime;
+    this.settled = false;
+    this.settleCursor = 0;
   }
 }
 
+/**
+ * Market without its bets, for views that only need pools and timing.
+ */
+export class MarketSummary {
+  id: number;
+  description: string;
+  endTime: bigint;
+  yesPool: bigint;
+  noPool: bigint;
+  resolved: boolean;
+
+  constructor(market: Market) {
+    this.id = market.id;
+    this.description = market.description;
+    this.endTime = market.endTime;
+    this.yesPool = market.yesPool;
+    this.noPool = market.noPool;
+    this.resolved = market.resolved;
+  }
+}
+
+/**
+ * One bet together with the market it was placed on.
+ */
+export class UserBet {
+  marketId: number;
+  description: string;
+  resolved: boolean;
+  outcome: Outcome;
+  amount: bigint;
+
+  constructor(market: Market, bet: Bet) {
+    this.marketId = market.id;
+    this.description = market.description;
+    this.resolved = market.resolved;
+    this.outcome = bet.outcome;
+    this.amount = bet.amount;
+  }
+}
+
+/**
+ * Settlement progress of a market.
+ */
+export class SettlementStatus {
+  resolved: boolean;
+  settled: boolean;
+  cursor: number;
+  totalBets: number;
+
+  constructor(market: Market) {
+    this.resolved = market.resolved;
+    this.settled = market.resolved && market.settled !== false;
+    this.cursor = market.settleCursor || 0;
+    this.totalBets = market.bets.length;
+  }
+}
+
+// Upper bound on markets returned by one getMarketsPage call.
+const MAX_PAGE_SIZE = 100;
+// Markets with at most this many bets are paid out inside resolveMarketWithOutcome;
+// larger ones are settled afterwards with settleBatch.
+const INLINE_SETTLEMENT_LIMIT = 20;
+// Upper bound on bets processed by one settleBatch call.
+const MAX_SETTLE_BATCH = 100;
+
 @NearBindgen({})
 export class PredictionMarket {
   // Persistent state.
@@ -135,34 +204,79 @@ export class PredictionMarket {
     const finalOutcome = this.parseOutcome(outcomeStr);
     market.resolved = true;
     market.outcome = finalOutcome;
+    market.settleCursor = 0;
+    market.settled = false;
+    if (market.bets.length <= INLINE_SETTLEMENT_LIMIT) {
+      this.settleRange(market, market.bets.length);
+    } else {
+      near.log(`Market ${marketId} resolved; ${market.bets.length} bets to settle with settleBatch`);
+    }
     this.markets.set(marketKey, market);
-    this.distributePayouts(market, finalOutcome);
   }
 
-  private distributePayouts(market: Market, outcome: Outcome): void {
-    const totalPool = market.yesPool + market.noPool;
-    if (totalPool === BigInt(0)) return;
-    const winningPool = outcome === Outcome.Yes ? market.yesPool : market.noPool;
-    const losingPool = outcome === Outcome.Yes ? market.noPool : market.yesPool;
-    if (winningPool === BigInt(0)) {
-      this.refundAll(market);
-      return;
+  /**
+   * Pay out the next `limit` bets of a resolved market, starting at `cursor`.
+   * `cursor` must equal the market's stored cursor, so a retried or duplicated
+   * call can never pay the same bets twice, and `limit` must be a positive
+   * integer, so the cursor only ever moves forward. Returns the new cursor.
+   */
+  @call({})
+  settleBatch({ marketId, cursor, limit }: { marketId: number, cursor: number, limit: number }): number {
+    this.ensureState();
+    const marketKey = marketId.toString();
+    const market = this.markets.get(marketKey);
+    if (!market) {
+      throw new Error("Market not found");
     }
-    for (const bet of market.bets) {
-      if (bet.outcome === outcome) {
-        const share = (bet.amount * losingPool) / winningPool;
-        const payout = bet.amount + share;
-        const promise = near.promiseBatchCreate(bet.user);
-        near.promiseBatchActionTransfer(promise, payout);
-      }
+    if (!market.resolved) {
+      throw new Error("Market not yet resolved");
+    }
+    if (market.settled !== false) {
+      throw new Error("Market already settled");
+    }
+    if (cursor !== market.settleCursor) {
+      throw new Error(`Stale settlement cursor: expected ${market.settleCursor}`);
+    }
+    if (!Number.isInteger(limit) || limit <= 0) {
+      throw new Error("Limit must be a positive integer");
+    }
+    const end = Math.min(market.bets.length, cursor + Math.min(limit, MAX_SETTLE_BATCH));
+    if (end <= market.settleCursor) {
+      throw new Error("Settlement cursor must advance");
     }
+    this.settleRange(market, end);
+    this.markets.set(marketKey, market);
+    return market.settleCursor;
   }
 
-  private refundAll(market: Market): void {
-    for (const bet of market.bets) {
-      const promise = near.promiseBatchCreate(bet.user);
-      near.promiseBatchActionTransfer(promise, bet.amount);
+  /**
+   * Settle bets [settleCursor, end) and advance the cursor. Amounts owed to the
+   * same account within the range are summed into a single transfer.
+   */
+  private settleRange(market: Market, end: number): void {
+    const winningPool = market.outcome === Outcome.Yes ? market.yesPool : market.noPool;
+    const losingPool = market.outcome === Outcome.Yes ? market.noPool : market.yesPool;
+    const owed = new Map<string, bigint>();
+    for (let i = market.settleCursor; i < end; i++) {
+      const bet = market.bets[i];
+      let amount = BigInt(0);
+      if (winningPool === BigInt(0)) {
+        // Nobody backed the winning side: refund everyone.
+        amount = bet.amount;
+      } else if (bet.outcome === market.outcome) {
+        const share = (bet.amount * losingPool) / winningPool;
+        amount = bet.amount + share;
+      }
+      if (amount > BigInt(0)) {
+        owed.set(bet.user, (owed.get(bet.user) || BigInt(0)) + amount);
+      }
     }
+    owed.forEach((amount, user) => {
+      const promise = near.promiseBatchCreate(user);
+      near.promiseBatchActionTransfer(promise, amount);
+    });
+    market.settleCursor = end;
+    market.settled = end >= market.bets.length;
   }
 
   private parseOutcome(outcomeStr: string): Outcome {
@@ -177,6 +291,101 @@ export class PredictionMarket {
     return this.markets.get(marketId.toString());
   }
 
+  @view({})
+  getSettlementStatus({ marketId }: { marketId: number }): SettlementStatus | null {
+    this.ensureState();
+    const market = this.markets.get(marketId.toString());
+    return market ? new SettlementStatus(market) : null;
+  }
+
+  /**
+   * Ids of resolved markets whose payouts still need settleBatch calls.
+   */
+  @view({})
+  getUnsettledMarketIds(): number[] {
+    this.ensureState();
+    const ids: number[] = [];
+    for (let i = 1; i <= this.marketCounter; i++) {
+      const m = this.markets.get(i.toString());
+      if (m !== null && m.resolved && m.settled === false) {
+        ids.push(m.id);
+      }
+    }
+    return ids;
+  }
+
+  /**
+   * Markets with ids in [fromId, fromId + limit), in id order. limit is capped at MAX_PAGE_SIZE.
+   */
+  @view({})
+  getMarketsPage({ fromId, limit }: { fromId: number, limit: number }): Market[] {
+    this.ensureState();
+    const start = Math.max(1, fromId);
+    const end = Math.min(this.marketCounter, start + Math.min(limit, MAX_PAGE_SIZE) - 1);
+    const page: Market[] = [];
+    for (let i = start; i <= end; i++) {
+      const m = this.markets.get(i.toString());
+      if (m !== null) {
+        page.push(m);
+      }
+    }
+    return page;
+  }
+
+  /**
+   * Summaries (no bets) of every unresolved market.
+   */
+  @view({})
+  getActiveMarketSummaries(): MarketSummary[] {
+    this.ensureState();
+    const summaries: MarketSummary[] = [];
+    for (let i = 1; i <= this.marketCounter; i++) {
+      const m = this.markets.get(i.toString());
+      if (m !== null && !m.resolved) {
+        summaries.push(new MarketSummary(m));
+      }
+    }
+    return summaries;
+  }
+
+  /**
+   * Summaries of unresolved markets whose endTime is before `now` (nanoseconds, as a string).
+   */
+  @view({})
+  getExpiredUnresolved({ now }: { now: string }): MarketSummary[] {
+    this.ensureState();
+    const cutoff = BigInt(now);
+    const summaries: MarketSummary[] = [];
+    for (let i = 1; i <= this.marketCounter; i++) {
+      const m = this.markets.get(i.toString());
+      if (m !== null && !m.resolved && m.endTime < cutoff) {
+        summaries.push(new MarketSummary(m));
+      }
+    }
+    return summaries;
+  }
+
+  /**
+   * Every bet placed by `account`, with its market's id, description and resolution state.
+   */
+  @view({})
+  getBetsByUser({ account }: { account: string }): UserBet[] {
+    this.ensureState();
+    const bets: UserBet[] = [];
+    for (let i = 1; i <= this.marketCounter; i++) {
+      const m = this.markets.get(i.toString());
+      if (m === null) {
+        continue;
+      }
+      for (const bet of m.bets) {
+        if (bet.user === account) {
+          bets.push(new UserBet(m, bet));
+        }
+      }
+    }
+    return bets;
+  }
+
   @view({})
   getAllMarkets(): Market[] {
     this.ensureState();
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.metrics import metrics
+
+# Status codes worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _redact(url):
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+class HttpError(Exception):
+    """
+    Raised when a request fails after all retries or its deadline passes.
+    """
+
+
+class HttpClient:
+    """
+    Shared fetch layer for every oracle data source.
+
+    One pooled requests.Session is reused across calls, with keep-alive connections
+    per host. Each batch of requests runs on asyncio: blocking requests happen in
+    worker threads, at most `per_host_limit` at a time per host. Every request has
+    a per-attempt `timeout` and an overall `deadline`. Connection errors, timeouts,
+    429s and 5xx responses are retried with jittered exponential backoff.
+    Identical URLs requested in the same batch are fetched only once.
+
+    With a ResponseCache, fresh cached bodies are returned without a request and
+    stale ones are revalidated with If-None-Match / If-Modified-Since.
+
+    Every request actually sent (retries included, cache hits not) is counted in
+    `api_requests_total`, labelled with `api_names[host]` or else the host.
+    """
+
+    def __init__(self, per_host_limit=4, timeout=10.0, deadline=30.0, retries=3, backoff=0.5,
+                 session=None, cache=None, clock=time.monotonic, api_names=None):
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.api_names = api_names or {}
+        self._clock = clock
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=per_host_limit * 2)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def _get(self, url, timeout, headers=None):
+        return self.session.get(url, timeout=timeout, headers=headers)
+
+    async def _fetch(self, url, semaphores):
+        cached = None
+        if self.cache is not None:
+            cached, fresh = self.cache.lookup(url)
+            if fresh:
+                return json.loads(cached.body)
+        headers = self.cache.conditional_headers(cached) if self.cache is not None else {}
+
+        host = urlsplit(url).netloc
+        semaphore = semaphores.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        give_up_at = self._clock() + self.deadline
+        last_error = None
+        for attempt in range(self.retries + 1):
+            remaining = give_up_at - self._clock()
+            if remaining <= 0:
+                break
+            try:
+                async with semaphore:
+                    metrics.inc("api_requests_total", api=self.api_names.get(host, host))
+                    response = await asyncio.to_thread(self._get, url, min(self.timeout, remaining), headers)
+                if response.status_code == 304 and cached is not None:
+                    self.cache.mark_revalidated(url)
+                    return json.loads(cached.body)
+                if response.status_code < 400:
+                    if self.cache is None:
+                        return response.json()
+                    self.cache.store(url, response.text, response.headers.get("ETag"),
+                                     response.headers.get("Last-Modified"))
+                    return json.loads(response.text)
+                # Error messages name only host and path so API keys never reach the logs.
+                if response.status_code not in RETRY_STATUSES:
+                    raise HttpError(f"HTTP {response.status_code} from {_redact(url)}")
+                last_error = HttpError(f"HTTP {response.status_code}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # The exception text embeds the full URL, so only keep its type.
+                last_error = type(e).__name__
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+            if self._clock() + delay >= give_up_at:
+                break
+            await asyncio.sleep(delay)
+        raise HttpError(f"Giving up on {_redact(url)}: {last_error}")
+
+    async def gather_json(self, urls):
+        """
+        Fetch every URL concurrently and return their decoded JSON bodies in order.
+        Failed URLs yield their exception instead of a body.
+        """
+        semaphores = {}
+        in_flight = {}
+        for url in urls:
+            if url not in in_flight:
+                in_flight[url] = asyncio.ensure_future(self._fetch(url, semaphores))
+        await asyncio.gather(*in_flight.values(), return_exceptions=True)
+        return [in_flight[url].exception() or in_flight[url].result() for url in urls]
+
+    def get_json_many(self, urls):
+        """
+        Blocking wrapper around gather_json for the synchronous resolver code.
+        """
+        if not urls:
+            return []
+        return asyncio.run(self.gather_json(list(urls)))
+
+    def get_json(self, url):
+        """
+        Fetch one URL and return its decoded JSON body, raising on failure.
+        """
+        result = self.get_json_many([url])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
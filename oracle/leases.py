@@ -0,0 +1,85 @@
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    market_id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseTable:
+    """
+    Local SQLite lease table so each market is resolved by exactly one worker.
+
+    `claim()` atomically takes a market if nobody holds it, the holder's lease
+    expired (a crashed worker), or the caller already holds it. A resolved
+    market's lease is kept for `done_grace` seconds after release, so workers
+    reading a slightly stale market list do not resolve it again. An unresolved
+    market's lease is dropped, so it can be claimed again immediately.
+    """
+
+    def __init__(self, path, lease_ttl=300.0, done_grace=600.0, clock=time.time):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self.done_grace = done_grace
+        self._clock = clock
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # isolation_level=None: BEGIN IMMEDIATE below controls the write lock explicitly.
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def claim(self, market_id, owner):
+        """
+        Try to take the lease on `market_id`. Returns True if `owner` now holds it.
+        """
+        now = self._clock()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT owner, expires_at FROM leases WHERE market_id = ?", (market_id,)).fetchone()
+                if row is not None and row[0] != owner and row[1] > now:
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases VALUES (?, ?, ?)",
+                    (market_id, owner, now + self.lease_ttl),
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def release(self, market_id, owner, resolved):
+        with closing(self._connect()) as conn:
+            if resolved:
+                conn.execute(
+                    "UPDATE leases SET expires_at = ? WHERE market_id = ? AND owner = ?",
+                    (self._clock() + self.done_grace, market_id, owner),
+                )
+            else:
+                conn.execute("DELETE FROM leases WHERE market_id = ? AND owner = ?", (market_id, owner))
+
+    def purge_expired(self):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM leases WHERE expires_at <= ?", (self._clock(),))
+
+
+def in_shard(market_id, worker_index, worker_count):
+    """
+    Static partition of markets across workers by id.
+    """
+    return market_id % worker_count == worker_index
@@ -0,0 +1,137 @@
+import mmap
+import os
+import re
+import struct
+import threading
+
+MAGIC = b"BBXPRICE"
+# magic, capacity, count, next write slot
+HEADER = struct.Struct("<8sQQQ")
+# unix timestamp (seconds), USD price
+RECORD = struct.Struct("<dd")
+TIMESTAMP = struct.Struct("<d")
+
+
+class PriceSeries:
+    """
+    Fixed-capacity ring buffer of (timestamp, price) samples for one asset, stored
+    in a memory-mapped file. Samples are appended in timestamp order, so the
+    logical sequence stays sorted and can be binary searched; once full, the
+    oldest sample is overwritten.
+    """
+
+    def __init__(self, path, capacity):
+        size = HEADER.size + capacity * RECORD.size
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER.size
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if exists:
+            magic, self.capacity, _, _ = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Not a price history file: {path}")
+        else:
+            self.capacity = capacity
+            HEADER.pack_into(self._map, 0, MAGIC, capacity, 0, 0)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return HEADER.unpack_from(self._map, 0)[2]
+
+    def _slot(self, i, count, head):
+        # Physical slot of the i-th oldest sample.
+        return (head - count + i) % self.capacity
+
+    def _timestamp(self, slot):
+        return TIMESTAMP.unpack_from(self._map, HEADER.size + slot * RECORD.size)[0]
+
+    def _record(self, slot):
+        return RECORD.unpack_from(self._map, HEADER.size + slot * RECORD.size)
+
+    def append(self, timestamp, price):
+        """
+        Add a sample. Samples not newer than the latest one are ignored, so the
+        same quote seen twice is stored once. Returns True if it was stored.
+        """
+        _, _, count, head = HEADER.unpack_from(self._map, 0)
+        if count and timestamp <= self._timestamp((head - 1) % self.capacity):
+            return False
+        RECORD.pack_into(self._map, HEADER.size + head * RECORD.size, timestamp, price)
+        HEADER.pack_into(self._map, 0, MAGIC, self.capacity, min(count + 1, self.capacity), (head + 1) % self.capacity)
+        return True
+
+    def at_or_before(self, timestamp):
+        """
+        Return the latest (timestamp, price) sample taken at or before `timestamp`,
+        or None if there is none.
+        """
+        _, _, count, head = HEADER.unpack_from(self._map, 0)
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp(self._slot(mid, count, head)) <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        if not lo:
+            return None
+        return self._record(self._slot(lo - 1, count, head))
+
+
+class PriceHistory:
+    """
+    Per-asset price time series under `directory`, one PriceSeries file per asset.
+    Only one process should record samples; any number may read them.
+    """
+
+    def __init__(self, directory, capacity=10080):
+        self.directory = directory
+        self.capacity = capacity
+        self._series = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, asset):
+        name = re.sub(r"[^a-z0-9_-]", "_", asset.lower())
+        return os.path.join(self.directory, f"{name}.prices")
+
+    def series(self, asset, create=False):
+        asset = asset.lower()
+        with self._lock:
+            series = self._series.get(asset)
+            if series is None:
+                path = self._path(asset)
+                if not create and not os.path.exists(path):
+                    return None
+                series = self._series[asset] = PriceSeries(path, self.capacity)
+            return series
+
+    def record(self, asset, timestamp, price):
+        series = self.series(asset, create=True)
+        with self._lock:
+            return series.append(timestamp, price)
+
+    def price_at(self, asset, timestamp, max_gap):
+        """
+        Price of `asset` at `timestamp`: the latest sample taken at or before it,
+        or None if there is none within `max_gap` seconds. Samples taken after
+        `timestamp` are never used, even if closer.
+        """
+        series = self.series(asset)
+        if series is None:
+            return None
+        with self._lock:
+            sample = series.at_or_before(timestamp)
+        if sample is None or timestamp - sample[0] > max_gap:
+            return None
+        return sample[1]
+
+    def close(self):
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            self._series.clear()
@@ -1,8 +1,26 @@
-import os
 import time
+_IMPORT_STARTED = time.perf_counter()
+import os
+import sys
+import argparse
 import json
-import requests
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from response_cache import ResponseCache
+from score_index import ScoreIndex, TEAM_ALIASES
+from scheduler import run_scheduler
+from leases import LeaseTable, default_worker_id, in_shard
+from price_history import PriceHistory
+
+# Shared modules live in the repository's common/ package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.market_spec import get_market_spec, InvalidMarket
+from common.metrics import metrics
+from common.settlement import SettlementBook, format_near, YOCTO_PER_NEAR
+from common.app_context import AppContext
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,283 +31,742 @@ ORACLE_ACCOUNT_ID = os.getenv("ORACLE_ACCOUNT_ID")
 ODDS_API_KEY = os.getenv("ODDS_API_KEY")
 ORACLE_PRIVATE_KEY = os.getenv("ORACLE_PRIVATE_KEY")
 
-if not (CONTRACT_ID and ORACLE_ACCOUNT_ID and ODDS_API_KEY and ORACLE_PRIVATE_KEY):
-    raise ValueError("Missing one or more required environment variables.")
+# Clients, caches and local databases are built on first use, so importing this
+# module is cheap and needs no secrets. main() validates the environment up front.
+context = AppContext(required=("ORACLE_ACCOUNT_ID", "ODDS_API_KEY", "ORACLE_PRIVATE_KEY"))
+
+def build_signer(private_key):
+    context.validate()
+    signer = context.import_module("near_api.signer")
+    return signer.Signer(ORACLE_ACCOUNT_ID, signer.KeyPair(private_key))
+
+# NEAR RPC provider (testnet endpoint), the oracle's signer and its account.
+context.provide("provider", lambda: context.import_module("near_api.providers").JsonProvider("https://rpc.testnet.near.org"))
+context.provide("signer", lambda: build_signer(ORACLE_PRIVATE_KEY))
+context.provide("oracle_account", lambda: context.import_module("near_api.account").Account(context.provider, context.signer))
+
+# On-disk cache of Odds API and CoinGecko responses. TTLs are in seconds per host;
+# a rerun within the TTL spends no API quota.
+context.provide("response_cache", lambda: ResponseCache(
+    os.getenv("RESPONSE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "responses.sqlite3")),
+    {
+        "api.the-odds-api.com": float(os.getenv("ODDS_CACHE_TTL", "600")),
+        "api.coingecko.com": float(os.getenv("COINGECKO_CACHE_TTL", "60")),
+    },
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+))
+
+# Shared, pooled HTTP client for the Odds API and CoinGecko.
+context.provide("http_client", lambda: context.import_module("http_client").HttpClient(
+    per_host_limit=int(os.getenv("HTTP_PER_HOST_LIMIT", "4")),
+    timeout=float(os.getenv("HTTP_TIMEOUT", "10")),
+    deadline=float(os.getenv("HTTP_DEADLINE", "30")),
+    cache=context.response_cache,
+    api_names={"api.the-odds-api.com": "odds", "api.coingecko.com": "coingecko"}
+))
+
+# Gas attached to each resolveMarketWithOutcome call.
+RESOLVE_GAS = 30000000000000
+
+# Parallel getMarket calls when fetching the bets of expired markets (payout preview).
+MARKET_FETCH_WORKERS = int(os.getenv("MARKET_FETCH_WORKERS", "8"))
+
+# Markets with many bets are paid out afterwards in settleBatch calls of this size
+# (at least 1; the contract caps it at MAX_SETTLE_BATCH).
+SETTLE_BATCH_SIZE = int(os.getenv("SETTLE_BATCH_SIZE", "50"))
+SETTLE_GAS = 150000000000000
 
-# Import near_api classes
-from near_api.providers import JsonProvider
-from near_api.signer import KeyPair, Signer
-from near_api.account import Account
+# Scheduler (--daemon) timing, in seconds.
+SPORTS_SETTLE_DELAY = float(os.getenv("SPORTS_SETTLE_DELAY", "10800"))
+CRYPTO_SETTLE_DELAY = float(os.getenv("CRYPTO_SETTLE_DELAY", "0"))
+SCHEDULER_RESYNC_INTERVAL = float(os.getenv("SCHEDULER_RESYNC_INTERVAL", "300"))
+SCHEDULER_RETRY_DELAY = float(os.getenv("SCHEDULER_RETRY_DELAY", "1800"))
 
-# Set up NEAR RPC provider (using testnet endpoint)
-provider = JsonProvider("https://rpc.testnet.near.org")
+# Metrics are only collected when a report path is set: a .json path gets a JSON
+# run report, anything else Prometheus text. Pool workers write one file each.
+METRICS_REPORT = os.getenv("METRICS_REPORT")
+if METRICS_REPORT:
+    metrics.enable()
 
-# Create a key pair and signer for the oracle account
-key_pair = KeyPair(ORACLE_PRIVATE_KEY)
-signer = Signer(ORACLE_ACCOUNT_ID, key_pair)
+# Broadcasts resolutions concurrently, managing the oracle key's nonce locally.
+context.provide("submitter", lambda: context.import_module("submitter").ResolutionSubmitter(
+    context.provider, context.signer, CONTRACT_ID, RESOLVE_GAS
+))
 
-# Create an account object for interacting with the contract
-oracle_account = Account(provider, signer)
+# Local price history so crypto markets resolve at their endTime. Prices of every
+# asset with an active crypto market are sampled every PRICE_SAMPLE_INTERVAL
+# seconds (--daemon, or --sample-prices from cron). A market uses the latest
+# sample taken at or before endTime, if it is at most PRICE_HISTORY_MAX_GAP
+# seconds older. Without one, the current price is used only within that gap
+# after endTime; later, the market stays unresolved until it is handled by hand.
+PRICE_SAMPLE_INTERVAL = float(os.getenv("PRICE_SAMPLE_INTERVAL", "60"))
+PRICE_HISTORY_MAX_GAP = float(os.getenv("PRICE_HISTORY_MAX_GAP", "900"))
+context.provide("price_history", lambda: PriceHistory(
+    os.getenv("PRICE_HISTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "prices")),
+    capacity=int(os.getenv("PRICE_HISTORY_CAPACITY", "10080"))
+))
 
-def get_all_markets():
+# Worker pool (--workers). Each worker resolves the markets of its id shard and
+# claims every market in a local lease table first, so two processes on this host
+# never pay gas for the same resolution. A crashed worker's leases expire after
+# LEASE_TTL seconds. Workers sharing one access key race on its nonce; giving
+# each worker its own key of the oracle account (ORACLE_WORKER_KEYS, comma
+# separated) avoids the resulting retries.
+ORACLE_WORKERS = int(os.getenv("ORACLE_WORKERS", "1"))
+ORACLE_WORKER_KEYS = [key for key in os.getenv("ORACLE_WORKER_KEYS", "").split(",") if key]
+LEASE_TTL = float(os.getenv("LEASE_TTL", "900"))
+context.provide("lease_table", lambda: LeaseTable(
+    os.getenv("LEASE_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "leases.sqlite3")),
+    lease_ttl=LEASE_TTL
+))
+
+def view_contract(method_name, args):
+    """
+    Call a view function on the contract and return its decoded result.
+    """
+    metrics.inc("near_view_calls_total", method=method_name)
+    return context.oracle_account.view_function(CONTRACT_ID, method_name, args).get("result")
+
+def unresolved_markets_from_full_state():
+    """
+    Unresolved markets read with getAllMarkets, without their bets. Fallback for
+    contracts deployed before the bet-free views existed.
     """
-    Fetch all markets using the contract's getAllMarkets view function.
-    The near_api call returns a dictionary that includes a "result" key,
-    which contains the list of markets.
+    return [{key: value for key, value in m.items() if key != "bets"}
+            for m in view_contract("getAllMarkets", {}) if not m.get("resolved", False)]
+
+def get_expired_markets(now_ns):
+    """
+    Fetch summaries (no bets) of unresolved markets whose endTime is before now_ns.
     """
     try:
-        res = oracle_account.view_function(CONTRACT_ID, "getAllMarkets", {})
-        # Extract the list of markets from the "result" key
-        markets = res.get("result", [])
+        markets = view_contract("getExpiredUnresolved", {"now": str(now_ns)})
     except Exception as e:
-        print("Error calling getAllMarkets:", e)
-        markets = []
+        print("Error calling getExpiredUnresolved, reading getAllMarkets instead:", e)
+        try:
+            markets = [m for m in unresolved_markets_from_full_state() if int(m["endTime"]) < now_ns]
+        except Exception as e:
+            print("Error calling getAllMarkets:", e)
+            markets = []
     return markets
 
-def resolve_market_onchain(market_id, outcome_str):
+@metrics.timed("resolve_markets_onchain")
+def resolve_markets_onchain(resolutions):
+    """
+    Resolve many markets at once: all transactions are broadcast back-to-back and
+    their outcomes collected afterwards, retrying only the ones that failed.
     """
-    Call the contract to resolve the market with the given outcome.
-    Uses the function_call method from near_api.
+    results = context.submitter.submit_all(resolutions)
+    outcomes = dict(resolutions)
+    for market_id, error in results.items():
+        if error is None:
+            metrics.inc("markets_resolved_total", outcome=outcomes[market_id])
+            print(f"Market {market_id} resolved with outcome '{outcomes[market_id]}'.")
+        else:
+            metrics.inc("errors_total", stage="resolve")
+            print(f"Error resolving market {market_id}:", error)
+    return results
+
+def get_unsettled_market_ids():
+    """
+    Ids of resolved markets whose payouts are not finished yet.
     """
-    args = {"marketId": market_id, "outcomeStr": outcome_str}
     try:
-        result = oracle_account.function_call(
-            CONTRACT_ID,
-            "resolveMarketWithOutcome",
-            args,
-            gas=30000000000000,
-            amount=0
-        )
-        print(f"Market {market_id} resolved with outcome '{outcome_str}':", result)
+        return view_contract("getUnsettledMarketIds", {})
     except Exception as e:
-        print(f"Error resolving market {market_id}:", e)
+        print("Error calling getUnsettledMarketIds:", e)
+        return []
+
+@metrics.timed("settle_markets")
+def settle_markets(market_ids):
+    """
+    Drive chunked settlement: send one settleBatch per unsettled market per round
+    (all markets in parallel) until every market reports settled. A market whose
+    batch fails is dropped until the next run; a stale cursor just means another
+    caller made progress, so its status is re-read in the next round. A market
+    whose cursor did not move since its last batch is dropped too, so a contract
+    that stops making progress cannot keep this loop going.
+    """
+    if SETTLE_BATCH_SIZE <= 0:
+        raise ValueError(f"SETTLE_BATCH_SIZE must be positive, got {SETTLE_BATCH_SIZE}")
+    pending = sorted(set(market_ids))
+    sent_cursors = {}
+    while pending:
+        calls = []
+        for market_id in pending:
+            try:
+                status = view_contract("getSettlementStatus", {"marketId": market_id})
+            except Exception as e:
+                print(f"Error reading settlement status of market {market_id}:", e)
+                continue
+            if status and not status["settled"] and status["cursor"] == sent_cursors.get(market_id):
+                metrics.inc("errors_total", stage="settle")
+                print(f"Settlement of market {market_id} is stuck at cursor {status['cursor']}.")
+            elif status and status["resolved"] and not status["settled"]:
+                args = {"marketId": market_id, "cursor": status["cursor"], "limit": SETTLE_BATCH_SIZE}
+                calls.append((market_id, "settleBatch", args, SETTLE_GAS))
+            elif status and status["settled"]:
+                print(f"Market {market_id} fully settled.")
+        if not calls:
+            break
+        metrics.inc("settle_batches_total", len(calls))
+        results = context.submitter.submit_calls(calls)
+        pending = []
+        for market_id, _, args, _ in calls:
+            error = results.get(market_id)
+            if error is None or "Stale settlement cursor" in error:
+                sent_cursors[market_id] = args["cursor"]
+                pending.append(market_id)
+            else:
+                metrics.inc("errors_total", stage="settle")
+                print(f"Error settling market {market_id} at cursor {args['cursor']}:", error)
+
+def sports_scores_url(sport_id):
+    return f"https://api.the-odds-api.com/v4/sports/{sport_id}/scores/?daysFrom=1&apiKey={ODDS_API_KEY}"
 
+@metrics.timed("fetch_sports_data")
 def fetch_sports_data(sport_id):
     """
     Fetch match data for the given sport_id from the Odds API.
     """
-    url = f"https://api.the-odds-api.com/v4/sports/{sport_id}/scores/?daysFrom=1&apiKey={ODDS_API_KEY}"
     try:
-        response = requests.get(url)
-        data = response.json()
-        return data
+        return context.http_client.get_json(sports_scores_url(sport_id))
     except Exception as e:
+        metrics.inc("errors_total", stage="odds_api")
         print("Error fetching Odds API data:", e)
         return []
 
-def resolve_sports_market(market):
+def evaluate_sports_market(spec, index):
     """
-    Resolve a sports market.
-    Expected market description formats:
-       "sport NBA Lakers win"         -> check if Lakers won
-       "sport NBA Lakers > 10"          -> check if Lakers won by more than 10 points
-       "sport NBA New York Knicks < 10" -> check if Knicks won by less than 10 points
+    Decide "yes" or "no" for a sports MarketSpec against one league's ScoreIndex.
     """
-    try:
-        parts = market["description"].split()
-        if len(parts) < 4:
-            print("Invalid sports market description:", market["description"])
-            return "no"
+    team = spec.subject
+    condition = spec.operator
+    threshold = spec.threshold
 
-        # The first part is "sport" and the second is the league.
-        league = parts[1].upper()
+    if not index:
+        print("No completed matches returned from Odds API.")
+        return "no"
 
-        # Identify the condition token ("win", ">", or "<")
-        conditions = {"win", ">", "<"}
-        condition_index = None
-        for i in range(2, len(parts)):
-            if parts[i].lower() in conditions:
-                condition_index = i
-                break
+    result = index.lookup(team)
+    if result is None:
+        print("No completed match found for team", team)
+        return "no"
 
-        if condition_index is None:
-            print("No valid condition found in sports market description:", market["description"])
-            return "no"
+    team_score = result.team_score
+    opponent_score = result.opponent_score
+    home_team = result.match.get("home_team", "")
+    away_team = result.match.get("away_team", "")
+    print(f"Match: {home_team} vs {away_team}. {result.team} score: {team_score}, Opponent score: {opponent_score}")
 
-        # The team name is all tokens between index 2 and the condition token.
-        team_tokens = parts[2:condition_index]
-        if not team_tokens:
-            print("No team name found in sports market description:", market["description"])
+    if condition == "win":
+        return "yes" if team_score > opponent_score else "no"
+    elif condition == ">":
+        if team_score <= opponent_score:
             return "no"
-        team = " ".join(team_tokens)
-
-        condition = parts[condition_index].lower()
-        threshold = None
-        if condition == "win":
-            pass  # no threshold needed
-        elif condition in {">", "<"}:
-            if len(parts) <= condition_index + 1:
-                print("Missing threshold in sports market description")
-                return "no"
-            try:
-                threshold = float(parts[condition_index + 1])
-            except:
-                print("Invalid threshold value in sports market description")
-                return "no"
-        else:
-            print("Unsupported condition in sports market description:", condition)
+        margin = team_score - opponent_score
+        return "yes" if margin > threshold else "no"
+    elif condition == "<":
+        if team_score <= opponent_score:
             return "no"
+        margin = team_score - opponent_score
+        return "yes" if margin < threshold else "no"
+    else:
+        return "no"
 
-        # Map league to Odds API sport ID.
-        sport_mapping = {
-            "NBA": "basketball_nba",
-            "MLS": "soccer_usa_mls",
-            "MLB": "baseball_mlb",
-            "EFL": "soccer_england_efl_cup",
-            "EPL": "soccer_epl"
-        }
-        sport_id = sport_mapping.get(league)
-        if not sport_id:
-            print("League not supported:", league)
-            return "no"
+def build_score_index(sport_id):
+    """
+    Fetch one league's scores and index them by team name.
+    """
+    return ScoreIndex(fetch_sports_data(sport_id), TEAM_ALIASES.get(sport_id))
 
-        data = fetch_sports_data(sport_id)
-        if not data:
-            print("No data returned from Odds API.")
-            return "no"
+def resolve_sports_market(market, scores_by_sport=None):
+    """
+    Resolve a sports market. Scores are taken from `scores_by_sport`
+    (sport_id -> ScoreIndex) when given, otherwise fetched for this market alone.
+    """
+    try:
+        spec = get_market_spec(market)
+        if scores_by_sport is not None and spec.sport_id in scores_by_sport:
+            index = scores_by_sport[spec.sport_id]
+        else:
+            index = build_score_index(spec.sport_id)
+        return evaluate_sports_market(spec, index)
+    except Exception as e:
+        print("Error in resolve_sports_market:", e)
+        return "no"
 
-        # Filter for completed matches involving the team.
-        match_found = None
-        for match in data:
-            if not match.get("completed", False):
-                continue
-            home_team = match.get("home_team", "")
-            away_team = match.get("away_team", "")
-            if team.lower() in home_team.lower() or team.lower() in away_team.lower():
-                match_found = match
-                break
-
-        if not match_found:
-            print("No completed match found for team", team)
-            return "no"
+def index_scores(sport_ids, payloads):
+    """
+    sport_id -> ScoreIndex for each league's Odds API payload; a failed fetch
+    (an exception instead of a payload) gives an empty index.
+    """
+    indexes = {}
+    for sport_id, payload in zip(sport_ids, payloads):
+        if isinstance(payload, Exception):
+            metrics.inc("errors_total", stage="odds_api")
+            print("Error fetching Odds API data:", payload)
+            payload = []
+        indexes[sport_id] = ScoreIndex(payload, TEAM_ALIASES.get(sport_id))
+    return indexes
 
-        scores = match_found.get("scores", [])
-        if not scores or len(scores) < 2:
-            print("No valid scores found in match")
-            return "no"
+# Keep bulk CoinGecko URLs comfortably under common URL length limits.
+MAX_PRICE_URL_LENGTH = 2000
 
-        team_score = None
-        opponent_score = None
-        home_team = match_found.get("home_team", "")
-        away_team = match_found.get("away_team", "")
-        for score_entry in scores:
-            name = score_entry.get("name", "")
-            try:
-                score_val = int(score_entry.get("score", "0"))
-            except:
-                score_val = 0
-            if team.lower() in name.lower():
-                team_score = score_val
+def price_requests(assets, extra_query=""):
+    """
+    CoinGecko simple/price requests covering `assets`, as (asset ids, url) pairs.
+    CoinGecko accepts comma-separated lowercase ids; requests are split into chunks
+    so no URL exceeds MAX_PRICE_URL_LENGTH.
+    """
+    base_url = f"https://api.coingecko.com/api/v3/simple/price?vs_currencies=usd{extra_query}&ids="
+    ids = sorted({asset.lower() for asset in assets})
+    chunks = []
+    chunk = []
+    length = len(base_url)
+    for asset_id in ids:
+        added = len(asset_id) + (1 if chunk else 0)
+        if chunk and length + added > MAX_PRICE_URL_LENGTH:
+            chunks.append(chunk)
+            chunk = []
+            length = len(base_url)
+            added = len(asset_id)
+        chunk.append(asset_id)
+        length += added
+    if chunk:
+        chunks.append(chunk)
+    return [(chunk, base_url + ",".join(chunk)) for chunk in chunks]
+
+def price_entries(chunks, responses):
+    """
+    Lowercase asset -> CoinGecko entry from the responses to `price_requests`
+    (`chunks`); assets that could not be priced are missing from the result.
+    """
+    entries = {}
+    for (chunk, _), data in zip(chunks, responses):
+        if isinstance(data, Exception):
+            metrics.inc("errors_total", stage="coingecko")
+            print("Error fetching crypto prices:", data)
+            continue
+        for asset_id in chunk:
+            if asset_id in data and "usd" in data[asset_id]:
+                entries[asset_id] = data[asset_id]
             else:
-                opponent_score = score_val
+                print("No price returned for crypto asset:", asset_id)
+    return entries
 
-        if team_score is None or opponent_score is None:
-            print("Could not determine scores for team", team)
-            return "no"
+def fetch_price_data(assets, extra_query=""):
+    """
+    Fetch CoinGecko simple/price data for many assets with as few requests as
+    possible. Returns lowercase asset -> CoinGecko entry.
+    """
+    chunks = price_requests(assets, extra_query)
+    return price_entries(chunks, context.http_client.get_json_many([url for _, url in chunks]))
 
-        print(f"Match: {home_team} vs {away_team}. {team} score: {team_score}, Opponent score: {opponent_score}")
+@metrics.timed("fetch_market_data")
+def fetch_market_data(sport_ids, assets):
+    """
+    Fetch each league's scores once and price all assets in as few requests as
+    possible, all in one concurrent batch so the Odds API and CoinGecko are
+    queried in parallel. Returns (sport_id -> ScoreIndex, lowercase asset -> price).
+    """
+    sport_ids = sorted(sport_ids)
+    chunks = price_requests(assets)
+    responses = context.http_client.get_json_many(
+        [sports_scores_url(sport_id) for sport_id in sport_ids] + [url for _, url in chunks])
+    scores_by_sport = index_scores(sport_ids, responses[:len(sport_ids)])
+    prices = {asset_id: entry["usd"] for asset_id, entry in price_entries(chunks, responses[len(sport_ids):]).items()}
+    return scores_by_sport, prices
 
-        if condition == "win":
-            return "yes" if team_score > opponent_score else "no"
-        elif condition == ">":
-            if team_score <= opponent_score:
-                return "no"
-            margin = team_score - opponent_score
-            return "yes" if margin > threshold else "no"
-        elif condition == "<":
-            if team_score <= opponent_score:
-                return "no"
-            margin = team_score - opponent_score
-            return "yes" if margin < threshold else "no"
-        else:
-            return "no"
-    except Exception as e:
-        print("Error in resolve_sports_market:", e)
-        return "no"
+@metrics.timed("fetch_crypto_prices")
+def fetch_crypto_prices(assets):
+    """
+    Fetch current USD prices for many assets. Returns lowercase asset -> price.
+    """
+    return {asset_id: entry["usd"] for asset_id, entry in fetch_price_data(assets).items()}
 
+@metrics.timed("fetch_crypto_price")
 def fetch_crypto_price(asset):
     """
     Fetch the current price of the asset (e.g. "ETH") using CoinGecko API.
     CoinGecko uses lowercase IDs, so ensure you pass the asset in lowercase.
     """
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={asset.lower()}&vs_currencies=usd"
-    try:
-        response = requests.get(url)
-        data = response.json()
-        price = data[asset.lower()]["usd"]
-        return price
-    except Exception as e:
-        print("Error fetching crypto price:", e)
-        return None
+    return fetch_crypto_prices([asset]).get(asset.lower())
+
+@metrics.timed("sample_crypto_prices")
+def sample_crypto_prices(markets=None):
+    """
+    Record the current price of every asset referenced by an active crypto market.
+    Each sample is stamped with CoinGecko's last_updated_at, so repeated quotes
+    (including ones served from the response cache) are stored once.
+    """
+    if markets is None:
+        markets = get_unresolved_markets()
+    assets = set()
+    for market in markets:
+        try:
+            spec = get_market_spec(market)
+        except InvalidMarket:
+            continue
+        if spec.kind == "crypto":
+            assets.add(spec.asset.lower())
+    if not assets:
+        return 0
+    stored = 0
+    now = time.time()
+    for asset_id, entry in fetch_price_data(assets, "&include_last_updated_at=true").items():
+        stored += context.price_history.record(asset_id, float(entry.get("last_updated_at") or now), entry["usd"])
+    print(f"Sampled prices of {len(assets)} crypto assets ({stored} new samples).")
+    return stored
 
-def resolve_crypto_market(market):
+def sample_prices_forever(stop, interval=PRICE_SAMPLE_INTERVAL):
+    """
+    Background loop for --daemon: sample prices every `interval` seconds until `stop` is set.
+    """
+    while not stop.is_set():
+        try:
+            sample_crypto_prices()
+        except Exception as e:
+            print("Error sampling crypto prices:", e)
+        stop.wait(interval)
+
+def historical_price(market):
+    """
+    Sampled price of a crypto market's asset at its endTime, or None if no sample
+    was taken shortly enough before it.
+    """
+    end_time = int(market["endTime"]) / 1e9
+    return context.price_history.price_at(get_market_spec(market).asset, end_time, PRICE_HISTORY_MAX_GAP)
+
+def current_price_usable(market, now=None):
+    """
+    Whether the current price can stand in for the price at a market's endTime:
+    only within PRICE_HISTORY_MAX_GAP seconds after it, like a sample would.
+    """
+    now = time.time() if now is None else now
+    return now - int(market["endTime"]) / 1e9 <= PRICE_HISTORY_MAX_GAP
+
+def resolve_crypto_market(market, prices=None):
     """
     Parse market description of the form: "crypto ETH > 80000"
-    and determine outcome by comparing the current price.
+    and determine outcome by comparing the price at endTime, taken from the local
+    price history. Without a close enough sample the current price is used if
+    endTime passed at most PRICE_HISTORY_MAX_GAP seconds ago, taken from `prices`
+    (lowercase asset -> price) when given, otherwise fetched for this market
+    alone. Returns None if the market cannot be priced at its endTime.
     """
     try:
-        # Split description into parts.
-        # Expecting format: "crypto ETH > 80000"
-        parts = market["description"].split()
-        if len(parts) < 4:
-            print("Description format invalid for crypto market:", market["description"])
-            return "no"
-        asset = parts[1]      # e.g., "ETH"
-        operator = parts[2]   # e.g., ">"
-        threshold = float(parts[3])
-        current_price = fetch_crypto_price(asset)
-        if current_price is None:
-            return "no"
-        print(f"Crypto market: {asset} current price = {current_price}, threshold = {threshold}")
+        spec = get_market_spec(market)
+        asset = spec.asset            # e.g., "ETH"
+        operator = spec.operator      # e.g., ">"
+        threshold = spec.threshold
+        current_price = historical_price(market)
+        if current_price is not None:
+            print(f"Crypto market: {asset} price at endTime = {current_price}, threshold = {threshold}")
+        elif not current_price_usable(market):
+            return None
+        else:
+            if prices is not None:
+                current_price = prices.get(asset.lower())
+            else:
+                current_price = fetch_crypto_price(asset)
+            if current_price is None:
+                return "no"
+            print(f"Crypto market: {asset} current price = {current_price}, threshold = {threshold}")
         if operator == ">":
             return "yes" if current_price > threshold else "no"
         elif operator == "<":
             return "yes" if current_price < threshold else "no"
-        elif operator == "=":
+        else:
             # For equality, you might want to allow a small delta.
             delta = 0.01 * threshold
             return "yes" if abs(current_price - threshold) < delta else "no"
-        else:
-            print("Unknown operator in crypto market:", operator)
-            return "no"
     except Exception as e:
         print("Error resolving crypto market:", e)
         return "no"
 
-def resolve_market_logic(market):
+def resolve_market_logic(market, scores_by_sport=None, prices=None):
     """
-    Determine the resolution outcome for a market.
-    For crypto markets (not implemented) returns "no".
-    For sport markets, calls resolve_sports_market.
+    Determine the resolution outcome for a valid market.
+    For crypto markets, calls resolve_crypto_market with any prefetched prices.
+    For sport markets, calls resolve_sports_market with any prefetched scores.
     """
-    desc = market["description"].lower()
-    if desc.startswith("crypto"):
-        return resolve_crypto_market(market)
-    elif desc.startswith("sport"):
-        return resolve_sports_market(market)
-    else:
-        print("Unknown market type in description:", desc)
-        return "no"
+    if get_market_spec(market).kind == "crypto":
+        return resolve_crypto_market(market, prices)
+    return resolve_sports_market(market, scores_by_sport)
+
+def fetch_markets(market_ids):
+    """
+    Full markets (with bets) for `market_ids`, fetched with getMarket in parallel.
+    Markets that cannot be fetched are left out.
+    """
+    def fetch(market_id):
+        try:
+            return view_contract("getMarket", {"marketId": market_id})
+        except Exception as e:
+            print(f"Error calling getMarket for market {market_id}:", e)
+            return None
+    if not market_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MARKET_FETCH_WORKERS, len(market_ids))) as executor:
+        return [m for m in executor.map(fetch, market_ids) if m]
+
+def transfer_obligation(resolutions):
+    """
+    Total yoctoNEAR the contract pays out for `resolutions` ((market_id, outcome)
+    pairs), computed exactly from each market's bets, and the ids of markets whose
+    bets could not be fetched (not counted). Expired markets take no more bets,
+    so the result holds whether they are fetched before or after resolution.
+    """
+    book = SettlementBook(fetch_markets([market_id for market_id, _ in resolutions]))
+    missing = [market_id for market_id, _ in resolutions if market_id not in book]
+    return book.obligation((market_id, outcome) for market_id, outcome in resolutions if market_id in book), missing
+
+def report_obligation(resolutions, obligation):
+    try:
+        total, missing = obligation.result()
+    except Exception as e:
+        print("Error computing the settlement obligation:", e)
+        return
+    metrics.set_gauge("settlement_obligation_near", total / YOCTO_PER_NEAR)
+    print(f"Resolving {len(resolutions)} markets pays out {format_near(total)} NEAR"
+          + (f", not counting markets {missing} whose bets could not be fetched." if missing else "."))
+
+@metrics.timed("resolve_markets")
+def resolve_markets(expired, owns=None):
+    """
+    Determine the outcome of each expired market and resolve them onchain.
+    Returns the ids of markets that are still unresolved afterwards (invalid
+    descriptions, crypto markets without a price at endTime, or failed
+    transactions). `owns(market_id)` limits which previously unsettled markets
+    this caller finishes paying out.
+
+    Resolution is planned in two phases: first every expired market is parsed
+    and the distinct leagues and crypto assets they need are found, then each
+    league's scores and all assets' prices are fetched in one concurrent batch
+    (fetch_market_data), shared by every market. Crypto markets with a price
+    sample near their endTime need no request at all. Markets whose description cannot be parsed,
+    and crypto markets that expired too long ago to use the current price, are
+    reported up front and left unresolved.
+    """
+    valid = []
+    unresolved = []
+    unpriced = []
+    sport_ids = set()
+    assets = set()
+    for market in expired:
+        try:
+            spec = get_market_spec(market)
+        except InvalidMarket as e:
+            metrics.inc("markets_invalid_total")
+            print(f"Skipping invalid market {market['id']}: {e}")
+            unresolved.append(market["id"])
+            continue
+        if spec.kind == "sport":
+            sport_ids.add(spec.sport_id)
+        elif historical_price(market) is None:
+            if not current_price_usable(market):
+                metrics.inc("markets_unpriced_total")
+                print(f"Skipping market {market['id']}: no price sample near its endTime.")
+                unpriced.append(market["id"])
+                continue
+            assets.add(spec.asset.lower())
+        valid.append(market)
+    if unresolved:
+        print(f"{len(unresolved)} expired markets are invalid and need manual resolution.")
+    if unpriced:
+        print(f"{len(unpriced)} expired crypto markets have no price at their endTime and are left unresolved.")
+        unresolved.extend(unpriced)
+
+    scores_by_sport, prices = fetch_market_data(sport_ids, assets)
+    print(f"{len(valid)} expired markets across {len(sport_ids)} leagues and {len(assets)} crypto assets.")
+
+    resolutions = []
+    for market in valid:
+        print(f"Market {market['id']} expired. Description: {market['description']}")
+        outcome = resolve_market_logic(market, scores_by_sport, prices)
+        if outcome is None:
+            print(f"Market {market['id']} could not be priced at its endTime; left unresolved.")
+            unresolved.append(market["id"])
+            continue
+        print(f"Determined outcome for market {market['id']}: {outcome}")
+        resolutions.append((market["id"], outcome))
+
+    if resolutions:
+        if METRICS_REPORT:
+            # The payout preview needs every market's bets, so it is only computed
+            # for the metrics report; fetch them while the resolutions are being
+            # broadcast rather than delaying them.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                obligation = executor.submit(transfer_obligation, resolutions)
+                results = resolve_markets_onchain(resolutions)
+            report_obligation(resolutions, obligation)
+        else:
+            results = resolve_markets_onchain(resolutions)
+        for market_id, error in results.items():
+            if error is not None and "Market already resolved" not in error:
+                unresolved.append(market_id)
+
+    # Large markets are only marked resolved above; finish paying them out, along
+    # with any market a previous run left partially settled. Markets that settled
+    # inline are not listed, so they need no status read.
+    unsettled = get_unsettled_market_ids()
+    if owns is not None:
+        unsettled = [market_id for market_id in unsettled if owns(market_id)]
+    settle_markets(unsettled)
+    print("Response cache:", context.response_cache.stats())
+    return unresolved
+
+def report_metrics():
+    if not METRICS_REPORT:
+        return
+    for name, value in context.response_cache.stats().items():
+        metrics.set_gauge(f"response_cache_{name}", value)
+    metrics.write_report(METRICS_REPORT)
 
-def process_expired_markets():
+def resolve_leased(markets, owner, owns=None):
     """
-    Fetch all markets and, for any unresolved market whose endTime has passed,
-    determine the outcome and resolve it onchain.
+    Resolve only the markets `owner` can lease. Markets leased by another worker
+    are reported as still unresolved. Leases of resolved markets are kept until
+    they expire, so a worker with a stale market list does not resolve them again.
     """
-    markets = get_all_markets()
+    claimed = [m for m in markets if context.lease_table.claim(m["id"], owner)]
+    if len(claimed) < len(markets):
+        print(f"{len(markets) - len(claimed)} markets are leased by other workers.")
+    unresolved = {m["id"] for m in markets} - {m["id"] for m in claimed}
+    try:
+        if claimed:
+            unresolved.update(resolve_markets(claimed, owns))
+    except BaseException:
+        for market in claimed:
+            context.lease_table.release(market["id"], owner, resolved=False)
+        raise
+    for market in claimed:
+        context.lease_table.release(market["id"], owner, resolved=market["id"] not in unresolved)
+    report_metrics()
+    return sorted(unresolved)
+
+def use_worker_key(worker_index):
+    """
+    Sign this worker's transactions with its own access key, if ORACLE_WORKER_KEYS is set.
+    """
+    if not ORACLE_WORKER_KEYS:
+        return
+    context.signer = build_signer(ORACLE_WORKER_KEYS[worker_index % len(ORACLE_WORKER_KEYS)])
+    context.reset("oracle_account", "submitter")
+
+def shard_filter(worker_index, worker_count):
+    return lambda market_id: in_shard(market_id, worker_index, worker_count)
+
+def process_expired_markets(worker_index=0, worker_count=1):
+    """
+    Fetch every unresolved market whose endTime has passed (getExpiredUnresolved,
+    without bets) and resolve the ones in this worker's shard.
+    """
+    owns = shard_filter(worker_index, worker_count)
     now_ns = int(time.time() * 1e9)
-    for market in markets:
-        if not market.get("resolved", False):
-            market_end = int(market.get("endTime", "0"))
-            if now_ns > market_end:
-                print(f"Market {market['id']} expired. Description: {market['description']}")
-                outcome = resolve_market_logic(market)
-                print(f"Determined outcome for market {market['id']}: {outcome}")
-                resolve_market_onchain(market["id"], outcome)
+    expired = [m for m in get_expired_markets(now_ns) if owns(m["id"])]
+    return resolve_leased(expired, default_worker_id(), owns)
+
+def get_unresolved_markets():
+    """
+    Summaries (no bets) of every unresolved market, for the scheduler.
+    """
+    try:
+        return view_contract("getActiveMarketSummaries", {})
+    except Exception as e:
+        print("Error calling getActiveMarketSummaries, reading getAllMarkets instead:", e)
+        return unresolved_markets_from_full_state()
+
+def settle_delay(market):
+    """
+    Seconds to wait after a market's endTime before resolving it. Sports results
+    need time to become final; crypto prices do not.
+    """
+    try:
+        kind = get_market_spec(market).kind
+    except InvalidMarket:
+        return 0
+    return SPORTS_SETTLE_DELAY if kind == "sport" else CRYPTO_SETTLE_DELAY
+
+def run_scheduler_worker(worker_index=0, worker_count=1):
+    """
+    Long-running scheduler for one shard of the markets.
+    """
+    owns = shard_filter(worker_index, worker_count)
+    owner = default_worker_id()
+    # One sampler per host is enough; every worker reads the shared history files.
+    stop_sampling = threading.Event()
+    if worker_index == 0:
+        threading.Thread(target=sample_prices_forever, args=(stop_sampling,), daemon=True).start()
+    try:
+        run_scheduler(
+            lambda: [m for m in get_unresolved_markets() if owns(m["id"])],
+            lambda due: resolve_leased(due, owner, owns),
+            settle_delay,
+            resync_interval=SCHEDULER_RESYNC_INTERVAL,
+            retry_delay=SCHEDULER_RETRY_DELAY
+        )
+    finally:
+        stop_sampling.set()
+
+def run_worker(target, worker_index, worker_count):
+    global METRICS_REPORT
+    use_worker_key(worker_index)
+    if METRICS_REPORT and worker_count > 1:
+        root, ext = os.path.splitext(METRICS_REPORT)
+        METRICS_REPORT = f"{root}.worker{worker_index}{ext}"
+    print(f"Oracle worker {worker_index + 1}/{worker_count} started (pid {os.getpid()}).")
+    target(worker_index, worker_count)
+
+def run_worker_pool(target, worker_count):
+    """
+    Run `target(worker_index, worker_count)` in one process per worker and wait for
+    all of them. SIGTERM is forwarded so every worker can stop cleanly.
+    """
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(target, index, worker_count), name=f"oracle-worker-{index}")
+        for index in range(worker_count)
+    ]
+    for worker in workers:
+        worker.start()
+    previous = signal.signal(signal.SIGTERM, lambda *_: [w.terminate() for w in workers if w.is_alive()])
+    try:
+        for worker in workers:
+            worker.join()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    failed = [worker.name for worker in workers if worker.exitcode]
+    if failed:
+        print("Oracle workers exited with errors:", ", ".join(failed))
 
 def main():
-    print("Polling contract for expired, unresolved markets...")
-    process_expired_markets()
+    parser = argparse.ArgumentParser(description="BetBotX oracle")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and resolve each market as soon as it is due")
+    parser.add_argument("--workers", type=int, default=ORACLE_WORKERS,
+                        help="number of worker processes, each resolving its own shard of market ids")
+    parser.add_argument("--sample-prices", action="store_true",
+                        help="only record current prices of assets with active crypto markets")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long imports and client setup took")
+    args = parser.parse_args()
+    context.validate()
+    if args.profile_startup:
+        import atexit
+        atexit.register(lambda: print(context.startup_report()))
+    if args.sample_prices:
+        sample_crypto_prices()
+        return
+    target = run_scheduler_worker if args.daemon else process_expired_markets
+    if not args.daemon:
+        print("Polling contract for expired, unresolved markets...")
+    if args.workers > 1:
+        run_worker_pool(target, args.workers)
+    else:
+        target(0, 1)
+
+context.record("import resolver", time.perf_counter() - _IMPORT_STARTED)
 
 if __name__ == "__main__":
     main()
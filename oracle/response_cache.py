@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that carry credentials and must never be part of a cache key.
+SECRET_PARAMS = {"apikey", "api_key", "x_cg_demo_api_key", "x_cg_pro_api_key"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at);
+"""
+
+
+def cache_key(url):
+    """
+    Normalize a URL into a cache key: lowercase host, sorted query, credentials removed.
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "last_modified", "stored_at")
+
+    def __init__(self, body, etag, last_modified, stored_at):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache in SQLite, so reruns shortly after a previous
+    run do not spend metered API quota again.
+
+    `ttls` maps host -> seconds a response is served without contacting the
+    server; hosts not listed are never served from cache without revalidation.
+    Stale entries that carry an ETag or Last-Modified are revalidated with a
+    conditional request. The cache is bounded to `max_bytes` of bodies, evicting
+    least recently used entries first.
+    """
+
+    def __init__(self, path, ttls, max_bytes=50 * 1024 * 1024, clock=time.time):
+        self.path = path
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def ttl_for(self, url):
+        return self.ttls.get(urlsplit(url).netloc.lower(), 0)
+
+    def lookup(self, url):
+        """
+        Return (entry, fresh) for `url`; entry is None when nothing is cached.
+        A fresh entry counts as a hit.
+        """
+        key = cache_key(url)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (self._clock(), key))
+        entry = CachedResponse(*row)
+        fresh = self._clock() - entry.stored_at < self.ttl_for(url)
+        if fresh:
+            self.hits += 1
+        return entry, fresh
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """
+        Cache a body fetched from the server; counts as a miss.
+        """
+        self.misses += 1
+        now = self._clock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(url), body, etag, last_modified, now, now, len(body)),
+            )
+            self._evict(conn)
+
+    def mark_revalidated(self, url):
+        """
+        A 304 confirmed the cached body; restart its TTL.
+        """
+        self.revalidated += 1
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (self._clock(), cache_key(url)))
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        lookups = self.hits + self.revalidated + self.misses
+        hit_rate = (self.hits + self.revalidated) / lookups if lookups else 0.0
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(hit_rate, 3),
+        }
@@ -0,0 +1,116 @@
+import heapq
+import signal
+import threading
+import time
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of unresolved markets keyed by the time they become due:
+    endTime plus a per-market settle delay (e.g. time for sports results to be final).
+
+    `add()` ignores markets already scheduled, so re-syncing the full unresolved
+    set only adds newly created markets. Resolved markets are dropped when they
+    are popped or when a re-sync no longer lists them.
+    """
+
+    def __init__(self, settle_delay):
+        # settle_delay(market) -> seconds to wait after endTime before resolving.
+        self._settle_delay = settle_delay
+        self._heap = []
+        self._markets = {}
+
+    def __len__(self):
+        return len(self._markets)
+
+    def add(self, market, due_at=None):
+        if market["id"] in self._markets:
+            return False
+        if due_at is None:
+            due_at = int(market["endTime"]) / NS_PER_SECOND + self._settle_delay(market)
+        self._markets[market["id"]] = market
+        heapq.heappush(self._heap, (due_at, market["id"]))
+        return True
+
+    def sync(self, unresolved):
+        """
+        Replace the schedule's view of unresolved markets. Returns the number of new markets.
+        """
+        live = {m["id"] for m in unresolved}
+        for market_id in list(self._markets):
+            if market_id not in live:
+                del self._markets[market_id]
+        return sum(1 for m in unresolved if self.add(m))
+
+    def next_due(self):
+        """
+        Due time (epoch seconds) of the earliest scheduled market, or None.
+        """
+        while self._heap and self._heap[0][1] not in self._markets:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """
+        Remove and return every market whose due time is <= now.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, market_id = heapq.heappop(self._heap)
+            market = self._markets.pop(market_id, None)
+            if market is not None:
+                due.append(market)
+        return due
+
+
+def run_scheduler(load_unresolved, resolve_due, settle_delay, resync_interval=300.0,
+                  retry_delay=1800.0, clock=time.time):
+    """
+    Long-running oracle loop: sleep until the next market is due (or the next
+    re-sync), resolve only the due markets, and repeat until SIGINT/SIGTERM.
+
+      - load_unresolved():     list of unresolved markets (id, description, endTime)
+      - resolve_due(markets):  resolves them; returns the ids that are still unresolved
+      - settle_delay(market):  seconds to wait after endTime
+
+    Markets that could not be resolved are retried after `retry_delay` seconds.
+    """
+    stop = threading.Event()
+    previous = {sig: signal.signal(sig, lambda *_: stop.set()) for sig in (signal.SIGINT, signal.SIGTERM)}
+    scheduler = ExpiryScheduler(settle_delay)
+    next_resync = 0.0
+    print(f"Oracle scheduler started (re-sync every {resync_interval}s).")
+
+    try:
+        while not stop.is_set():
+            now = clock()
+            if now >= next_resync:
+                try:
+                    added = scheduler.sync(load_unresolved())
+                    print(f"Scheduler re-synced: {added} new markets, {len(scheduler)} scheduled.")
+                except Exception as e:
+                    print("Error syncing unresolved markets:", e)
+                next_resync = now + resync_interval
+
+            due = scheduler.pop_due(now)
+            if due:
+                print(f"{len(due)} markets due for resolution.")
+                try:
+                    unresolved = set(resolve_due(due))
+                except Exception as e:
+                    print("Error resolving due markets:", e)
+                    unresolved = {m["id"] for m in due}
+                for market in due:
+                    if market["id"] in unresolved:
+                        scheduler.add(market, due_at=clock() + retry_delay)
+                continue
+
+            next_due = scheduler.next_due()
+            wake_at = next_resync if next_due is None else min(next_due, next_resync)
+            stop.wait(max(0.0, wake_at - clock()))
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        print("Oracle scheduler stopped.")
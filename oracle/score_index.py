@@ -0,0 +1,138 @@
+import bisect
+import re
+
+# Nicknames that cannot be derived from the official team name, per Odds API sport id.
+# Values are the team name as the Odds API spells it.
+TEAM_ALIASES = {
+    "basketball_nba": {
+        "sixers": "Philadelphia 76ers",
+        "blazers": "Portland Trail Blazers",
+        "cavs": "Cleveland Cavaliers",
+        "mavs": "Dallas Mavericks",
+        "wolves": "Minnesota Timberwolves",
+        "dubs": "Golden State Warriors",
+    },
+    "baseball_mlb": {
+        "yanks": "New York Yankees",
+        "dbacks": "Arizona Diamondbacks",
+        "d-backs": "Arizona Diamondbacks",
+    },
+    "soccer_epl": {
+        "man utd": "Manchester United",
+        "man united": "Manchester United",
+        "man city": "Manchester City",
+        "spurs": "Tottenham Hotspur",
+        "wolves": "Wolverhampton Wanderers",
+        "villa": "Aston Villa",
+        "forest": "Nottingham Forest",
+    },
+    "soccer_usa_mls": {
+        "galaxy": "LA Galaxy",
+        "lafc": "Los Angeles FC",
+        "nycfc": "New York City FC",
+        "red bulls": "New York Red Bulls",
+    },
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_team(name):
+    """
+    Canonical form used for every team lookup: lowercase alphanumeric words separated by one space.
+    """
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+class TeamResult:
+    """
+    One team's side of a completed match.
+    """
+
+    __slots__ = ("team", "opponent", "team_score", "opponent_score", "match")
+
+    def __init__(self, team, opponent, team_score, opponent_score, match):
+        self.team = team
+        self.opponent = opponent
+        self.team_score = team_score
+        self.opponent_score = opponent_score
+        self.match = match
+
+
+class ScoreIndex:
+    """
+    Index over one league's Odds API /scores payload, built once and shared by every market.
+
+    Each team's most recent completed match is stored under its normalized name.
+    Lookups try an exact key first: the full name, an alias from TEAM_ALIASES, or a
+    trailing word sequence of the name such as "knicks" when it names only one team.
+    They then fall back to a unique prefix of a full name. Ambiguous keys such as
+    "new york" never resolve, instead of silently picking the first match.
+    """
+
+    def __init__(self, payload, aliases=None):
+        self._results = {}
+        latest = {}
+        for match in payload or []:
+            if not match.get("completed", False):
+                continue
+            scores = {}
+            for entry in match.get("scores") or []:
+                try:
+                    scores[entry.get("name", "")] = int(entry.get("score", "0"))
+                except (TypeError, ValueError):
+                    scores[entry.get("name", "")] = 0
+            home = match.get("home_team", "")
+            away = match.get("away_team", "")
+            if home not in scores or away not in scores:
+                continue
+            started = match.get("commence_time") or ""
+            for team, opponent in ((home, away), (away, home)):
+                key = normalize_team(team)
+                if key in latest and latest[key] >= started:
+                    continue
+                latest[key] = started
+                self._results[key] = TeamResult(team, opponent, scores[team], scores[opponent], match)
+
+        # Exact keys: full names, trailing word sequences and aliases; ambiguous ones are dropped.
+        self._exact = {key: key for key in self._results}
+        ambiguous = set()
+        for key in self._results:
+            words = key.split()
+            for i in range(1, len(words)):
+                suffix = " ".join(words[i:])
+                if suffix in self._results:
+                    continue
+                if suffix in self._exact and self._exact[suffix] != key:
+                    ambiguous.add(suffix)
+                self._exact.setdefault(suffix, key)
+        for suffix in ambiguous:
+            del self._exact[suffix]
+        for alias, team in (aliases or {}).items():
+            key = normalize_team(team)
+            if key in self._results:
+                self._exact[normalize_team(alias)] = key
+
+        self._names = sorted(self._results)
+
+    def __len__(self):
+        return len(self._results)
+
+    def _resolve_key(self, team):
+        query = normalize_team(team)
+        if query in self._exact:
+            return self._exact[query]
+        lo = bisect.bisect_left(self._names, query)
+        hi = bisect.bisect_left(self._names, query + "\uffff")
+        if hi - lo == 1:
+            return self._names[lo]
+        if hi - lo > 1:
+            print(f"Team name '{team}' is ambiguous: {', '.join(self._names[lo:hi])}")
+        return None
+
+    def lookup(self, team):
+        """
+        Return the TeamResult of `team`'s most recent completed match, or None.
+        """
+        key = self._resolve_key(team)
+        return self._results.get(key) if key is not None else None
@@ -0,0 +1,151 @@
+import base58
+import json
+import time
+
+from near_api import transactions
+
+# Contract errors that mean the call must not be retried as-is.
+TERMINAL_ERRORS = (
+    "Market already resolved",
+    "Market not found",
+    "Market not yet expired",
+    "Market not yet resolved",
+    "Market already settled",
+    "Stale settlement cursor",
+)
+
+
+def sign_function_call(signer, receiver_id, nonce, block_hash, method_name, args, gas, amount=0):
+    """
+    Sign one function-call transaction and return its serialized bytes.
+    """
+    action = transactions.create_function_call_action(method_name, json.dumps(args).encode("utf8"), gas, amount)
+    return transactions.sign_and_serialize_transaction(receiver_id, nonce, [action], block_hash, signer)
+
+
+class ResolutionSubmitter:
+    """
+    Broadcasts many oracle transactions (resolveMarketWithOutcome, settleBatch)
+    without waiting for each one.
+
+    The oracle key's nonce is read once per round and then incremented locally, so
+    every transaction in a round is signed and sent with broadcast_tx_async
+    back-to-back. Their outcomes are then polled together with `tx`. Only
+    transactions that failed or timed out are retried in the next round, after
+    re-reading the nonce from the chain. Contract errors listed in TERMINAL_ERRORS
+    are not retried.
+
+    `provider` only needs get_access_key, get_status, send_tx and get_tx, so a local
+    fake RPC can stand in for JsonProvider; `sign` can be swapped the same way.
+    """
+
+    def __init__(self, provider, signer, contract_id, gas, method_name="resolveMarketWithOutcome",
+                 poll_interval=1.0, timeout=60.0, max_retries=2, sign=sign_function_call,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.provider = provider
+        self.signer = signer
+        self.contract_id = contract_id
+        self.gas = gas
+        self.method_name = method_name
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._sign = sign
+        self._clock = clock
+        self._sleep = sleep
+        self._nonce = None
+
+    def _sync_nonce(self):
+        access_key = self.provider.get_access_key(self.signer.account_id, self.signer.key_pair.encoded_public_key())
+        self._nonce = access_key["nonce"]
+
+    def _next_nonce(self):
+        self._nonce += 1
+        return self._nonce
+
+    def _broadcast(self, calls):
+        """
+        Sign and send every (key, method_name, args, gas) call. Returns key -> tx hash
+        for the ones accepted by the RPC, and key -> error for the rest. If the nonce
+        or block hash cannot be read, every call gets that error.
+        """
+        try:
+            self._sync_nonce()
+            block_hash = base58.b58decode(self.provider.get_status()["sync_info"]["latest_block_hash"].encode("utf8"))
+        except Exception as e:
+            return {}, {call[0]: str(e) for call in calls}
+        sent = {}
+        errors = {}
+        for key, method_name, args, gas in calls:
+            try:
+                signed = self._sign(self.signer, self.contract_id, self._next_nonce(), block_hash,
+                                    method_name, args, gas)
+                sent[key] = self.provider.send_tx(signed)
+            except Exception as e:
+                errors[key] = str(e)
+        return sent, errors
+
+    def _await_outcomes(self, sent):
+        """
+        Poll every pending transaction until it has a final status or the timeout passes.
+        Returns key -> None on success or an error string.
+        """
+        results = {}
+        pending = dict(sent)
+        deadline = self._clock() + self.timeout
+        while pending:
+            for key, tx_hash in list(pending.items()):
+                try:
+                    tx = self.provider.get_tx(tx_hash, self.signer.account_id)
+                except Exception:
+                    # Not yet known to the node; try again on the next poll.
+                    continue
+                status = tx.get("status", {})
+                if "SuccessValue" in status:
+                    results[key] = None
+                elif "Failure" in status:
+                    results[key] = json.dumps(status["Failure"])
+                else:
+                    continue
+                del pending[key]
+            if not pending:
+                break
+            if self._clock() >= deadline:
+                for key in pending:
+                    results[key] = "Timed out waiting for transaction outcome"
+                break
+            self._sleep(self.poll_interval)
+        return results
+
+    def submit_calls(self, calls):
+        """
+        Send every (key, method_name, args, gas) call. Returns key -> None for
+        success or the last error string for calls that could not be completed.
+        """
+        by_key = {call[0]: call for call in calls}
+        results = {}
+        remaining = list(calls)
+        for attempt in range(self.max_retries + 1):
+            if not remaining:
+                break
+            sent, errors = self._broadcast(remaining)
+            results.update(errors)
+            results.update(self._await_outcomes(sent))
+            remaining = [
+                by_key[call[0]] for call in remaining
+                if results.get(call[0]) is not None
+                and not any(err in results[call[0]] for err in TERMINAL_ERRORS)
+            ]
+            if remaining and attempt < self.max_retries:
+                print(f"Retrying {len(remaining)} failed transactions (attempt {attempt + 2}).")
+        return results
+
+    def submit_all(self, resolutions):
+        """
+        Resolve every (market_id, outcome) pair on chain. Returns market_id -> None
+        for success or the last error string for markets that could not be resolved.
+        """
+        return self.submit_calls([
+            (market_id, self.method_name, {"marketId": market_id, "outcomeStr": outcome}, self.gas)
+            for market_id, outcome in resolutions
+        ])
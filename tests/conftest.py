@@ -0,0 +1,23 @@
+"""
+Shared setup for the Python tests: the agent and oracle directories are import
+roots (as when their scripts run), and all local state goes to a temporary
+directory. The backend fakes come from bench/fakes.py.
+"""
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, "agent"), os.path.join(REPO_ROOT, "oracle")]
+
+STATE_DIR = tempfile.mkdtemp(prefix="betbotx-tests-")
+os.environ.update({
+    "CONTRACT_ID": "test.testnet",
+    "TWITTER_USER_ID": "1",
+    "WEB_APP_BASE_URL": "https://example.com",
+    "LAST_TWEET_ID_FILE": os.path.join(STATE_DIR, "last_tweet_id.txt"),
+    "MARKET_MIRROR_PATH": os.path.join(STATE_DIR, "market_mirror.sqlite3"),
+    "RESPONSE_CACHE_PATH": os.path.join(STATE_DIR, "responses.sqlite3"),
+    "LEASE_DB_PATH": os.path.join(STATE_DIR, "leases.sqlite3"),
+    "PRICE_HISTORY_DIR": os.path.join(STATE_DIR, "prices"),
+})
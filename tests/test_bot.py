@@ -0,0 +1,87 @@
+import json
+import time
+
+import pytest
+
+import bot
+from bench.fakes import CallLog, FakeContract, FakeNearAccount, FakeTwitterClient, make_markets, make_mentions
+from common.metrics import metrics
+from mention_cursor import write_since_id
+from twitter_client import ReplyDispatcher, TokenBucket
+
+DAY_NS = 86400 * 1_000_000_000
+
+
+@pytest.fixture
+def fake_bot(tmp_path, monkeypatch):
+    """
+    The bot wired to fake NEAR and Twitter backends, writing a JSON metrics report.
+    """
+    calls = CallLog()
+    markets = make_markets(5, 3, time.time_ns() + DAY_NS)
+    mentions = make_mentions(10, markets)
+    twitter = FakeTwitterClient(mentions, calls)
+    report = tmp_path / "metrics.json"
+    monkeypatch.setattr(bot, "METRICS_REPORT", str(report))
+    monkeypatch.setattr(bot, "get_client", lambda **kwargs: twitter)
+    bot.context.near_account = FakeNearAccount(FakeContract(markets, calls))
+    bot.context.reply_dispatcher = ReplyDispatcher(twitter, TokenBucket(1e9, 10 ** 9), workers=2)
+    write_since_id(bot.LAST_TWEET_ID_FILE, int(mentions[0].id) - 1)
+    metrics.reset()
+    metrics.enable()
+    yield twitter, mentions, report
+    metrics.enable(False)
+    bot.context.reply_dispatcher.close()
+    bot.context.reset()
+
+
+def test_drain_replies_waits_for_replies_and_writes_report(fake_bot):
+    twitter, _, report = fake_bot
+    bot.reply_to_tweet("1", "first")
+    bot.reply_to_tweet("2", "second")
+
+    assert bot.drain_replies() == (2, 0)
+    assert sorted(twitter.replies) == [("1", "first"), ("2", "second")]
+    assert "replies_total" in report.read_text()
+    spans = json.loads(report.read_text())["histograms"]["span_seconds"]
+    assert [entry["count"] for entry in spans if entry["labels"] == {"span": "reply_to_tweet"}] == [2]
+
+
+def test_rate_limited_replies_are_counted_and_retried():
+    import tweepy
+
+    class RateLimitedClient:
+        def __init__(self):
+            self.attempts = 0
+
+        def create_tweet(self, text=None, in_reply_to_tweet_id=None, **kwargs):
+            self.attempts += 1
+            if self.attempts == 1:
+                raise tweepy.TooManyRequests(None)
+            return {"id": "1"}
+
+    client = RateLimitedClient()
+    dispatcher = ReplyDispatcher(client, TokenBucket(1e9, 10 ** 9), workers=1, base_backoff=0)
+    metrics.reset()
+    metrics.enable()
+    try:
+        dispatcher.submit("1", "hello")
+        assert dispatcher.drain() == (1, 0)
+        report = metrics.to_report()
+    finally:
+        metrics.enable(False)
+        dispatcher.close()
+
+    assert client.attempts == 2
+    assert report["counters"]["replies_rate_limited_total"] == [{"labels": {}, "value": 1}]
+    spans = report["histograms"]["span_seconds"]
+    assert [entry["count"] for entry in spans if entry["labels"] == {"span": "reply_to_tweet"}] == [2]
+
+
+def test_process_mentions_writes_metrics_report(fake_bot):
+    twitter, mentions, report = fake_bot
+    bot.process_mentions()
+
+    assert len(twitter.replies) == len(mentions)
+    replies = json.loads(report.read_text())["counters"]["replies_total"]
+    assert {"labels": {"status": "sent"}, "value": len(mentions)} in replies
@@ -0,0 +1,45 @@
+import pytest
+
+from commands import CommandError, parse_command
+
+
+def test_bets_and_bet_are_different_commands():
+    bets = parse_command("@BetBotX bets Alice.testnet")
+    assert (bets.name, bets.address) == ("bets", "alice.testnet")
+
+    bet = parse_command("@BetBotX bet sport NBA Lakers win 1.5 YES")
+    assert (bet.name, bet.market, bet.amount, bet.outcome) == ("bet", "sport NBA Lakers win", "1.5", "yes")
+
+
+def test_markets_and_market_are_different_commands():
+    assert parse_command("@BetBotX markets").name == "markets"
+
+    market = parse_command("@BetBotX market crypto bitcoin > 100000")
+    assert (market.name, market.market) == ("market", "crypto bitcoin > 100000")
+
+
+def test_html_entities_are_unescaped():
+    # Twitter delivers ">" and "<" as "&gt;" and "&lt;".
+    bet = parse_command("@BetBotX bet crypto bitcoin &gt; 100000 2 no")
+    assert bet.market == "crypto bitcoin > 100000"
+
+    create = parse_command("@BetBotX create crypto near &lt; 5 2030-01-01 00:00:00")
+    assert create.market == "crypto near < 5"
+    assert create.market_tokens == ["crypto", "near", "&lt;", "5"]
+    assert create.spec.operator == "<"
+
+
+@pytest.mark.parametrize("text, error", [
+    ("@BetBotX bet sport NBA Lakers win abc yes", "Invalid amount: abc"),
+    ("@BetBotX bet sport NBA Lakers win -1 yes", "Invalid amount: -1"),
+    ("@BetBotX bet sport NBA Lakers win NaN yes", "Invalid amount: NaN"),
+    ("@BetBotX bet sport NBA Lakers win 1 maybe", "Invalid outcome: maybe (use yes or no)"),
+    ("@BetBotX bets alice..testnet", "Invalid address: alice..testnet"),
+    ("@BetBotX bets a", "Invalid address: a"),
+    ("@BetBotX bets", "Usage: bets <address>"),
+    ("@BetBotX betz alice.testnet", "Invalid command"),
+])
+def test_malformed_commands_are_rejected(text, error):
+    with pytest.raises(CommandError) as raised:
+        parse_command(text)
+    assert str(raised.value) == error
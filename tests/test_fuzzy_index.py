@@ -0,0 +1,53 @@
+import pytest
+
+from fuzzy_index import FuzzyMarketIndex, within_edits, words_match
+
+MARKETS = [
+    "sport NBA Los Angeles Clippers win",
+    "sport NBA New York Nets win",
+    "sport NBA Dallas Mavericks win",
+    "sport NBA Boston Celtics > 10",
+    "sport NBA Boston Celtics > 100",
+]
+
+
+@pytest.fixture
+def index():
+    index = FuzzyMarketIndex()
+    index.sync(1, [{"id": i, "description": d} for i, d in enumerate(MARKETS, 1)])
+    return index
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("sport NBA Dallas Mavricks win", 3),
+    ("sport  nba boston celitcs > 100", 5),
+    ("sport NBA Boston Celtics > 10.0", 4),
+    ("sport NBA Los Angeles Lakers win", None),
+    ("sport NBA New York Knicks win", None),
+    ("sport NBA Boston Celtics > 11", None),
+])
+def test_match(index, query, expected):
+    market_id, _ = index.match(query, 0.7, 0.1)
+    assert market_id == expected
+
+
+def test_near_miss_is_still_the_best_candidate(index):
+    _, best = index.match("sport NBA Los Angeles Lakers win", 0.7, 0.1)
+    assert best[1] == 1
+
+
+def test_sync_applies_only_changes(index):
+    markets = [{"id": i, "description": d} for i, d in enumerate(MARKETS, 1) if i != 3]
+    markets.append({"id": 6, "description": "sport NBA Miami Heat win", "resolved": False})
+    assert index.sync(2, markets) == (1, 1)
+    assert index.sync(1, []) == (0, 0)
+    market_id, best = index.match("sport NBA Dallas Mavricks win", 0.7, 0.1)
+    assert market_id is None and best[1] != 3
+    assert index.match("sport NBA Miami Haet win", 0.7, 0.1)[0] == 6
+
+
+def test_edit_distance():
+    assert within_edits("lakres", "lakers", 1)
+    assert not within_edits("lakers", "clippers", 1)
+    assert words_match(["new", "york", "knics"], ["new", "york", "knicks"])
+    assert not words_match(["york", "knicks"], ["new", "york", "knicks"])
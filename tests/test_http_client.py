@@ -0,0 +1,26 @@
+from bench.fakes import CallLog, FakeHttpSession
+from common.metrics import metrics
+from http_client import HttpClient
+from response_cache import ResponseCache
+
+PRICE_URL = "https://api.coingecko.com/api/v3/simple/price?vs_currencies=usd&ids=bitcoin"
+
+
+def api_requests():
+    return metrics.to_report()["counters"].get("api_requests_total", [])
+
+
+def test_only_network_requests_are_counted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), {"api.coingecko.com": 60})
+    client = HttpClient(session=FakeHttpSession(CallLog()), cache=cache, api_names={"api.coingecko.com": "coingecko"})
+    metrics.reset()
+    metrics.enable()
+    try:
+        client.get_json(PRICE_URL)
+        client.get_json(PRICE_URL)
+        requests = api_requests()
+    finally:
+        metrics.enable(False)
+
+    assert requests == [{"labels": {"api": "coingecko"}, "value": 1}]
+    assert (cache.hits, cache.misses) == (1, 1)
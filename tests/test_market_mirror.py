@@ -0,0 +1,39 @@
+import time
+
+from bench.fakes import CallLog, FakeContract, LegacyFakeContract, make_markets
+from common.market_mirror import MarketMirror
+
+DAY_NS = 86400 * 1_000_000_000
+
+
+def test_mirror_falls_back_to_get_all_markets_on_a_legacy_contract(tmp_path):
+    calls = CallLog()
+    markets = make_markets(5, 2, time.time_ns() + DAY_NS)
+    contract = LegacyFakeContract(markets, calls)
+    mirror = MarketMirror(contract.view, str(tmp_path / "mirror.sqlite3"))
+
+    assert mirror.sync() == (5, 0)
+    assert [m["id"] for m in mirror.unresolved_markets()] == [1, 2, 3, 4, 5]
+
+    contract.markets[2]["resolved"] = True
+    mirror.sync()
+    assert [m["id"] for m in mirror.unresolved_markets()] == [1, 3, 4, 5]
+    assert calls.counts["near.view.getAllMarkets"] == 2
+
+
+def test_mirror_uses_the_paged_views_when_they_exist(tmp_path):
+    calls = CallLog()
+    contract = FakeContract(make_markets(5, 2, time.time_ns() + DAY_NS), calls)
+    mirror = MarketMirror(contract.view, str(tmp_path / "mirror.sqlite3"))
+
+    assert mirror.sync() == (5, 0)
+    assert calls.counts["near.view.getAllMarkets"] == 0
+
+
+def test_load_returns_only_active_markets(tmp_path):
+    contract = FakeContract(make_markets(5, 2, time.time_ns() + DAY_NS), CallLog())
+    contract.markets[4]["resolved"] = True
+    mirror = MarketMirror(contract.view, str(tmp_path / "mirror.sqlite3"))
+
+    assert [m["id"] for m in mirror.load()] == [1, 2, 3, 5]
+    assert len(mirror.all_markets()) == 5
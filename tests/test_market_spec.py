@@ -0,0 +1,24 @@
+import pytest
+
+from common.market_spec import InvalidMarket, clear_spec_cache, get_market_spec
+
+
+def test_invalid_markets_raise_a_fresh_error_each_time():
+    clear_spec_cache()
+    market = {"id": 1, "description": "lottery 7 wins"}
+    errors = []
+    for _ in range(3):
+        with pytest.raises(InvalidMarket) as raised:
+            get_market_spec(market)
+        errors.append(raised.value)
+
+    assert errors[0] is not errors[1]
+    assert str(errors[0]) == str(errors[2]) == "Unknown market type in description: lottery 7 wins"
+    depth = [len(list(_frames(error.__traceback__))) for error in errors]
+    assert depth[0] == depth[2]
+
+
+def _frames(traceback):
+    while traceback is not None:
+        yield traceback
+        traceback = traceback.tb_next
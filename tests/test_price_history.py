@@ -0,0 +1,30 @@
+from price_history import PriceHistory
+
+
+def test_price_at_uses_the_latest_sample_at_or_before_the_timestamp(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    try:
+        for timestamp, price in ((100, 1.0), (200, 2.0), (300, 3.0)):
+            history.record("bitcoin", timestamp, price)
+
+        # The sample at 300 is closer, but was taken after 260.
+        assert history.price_at("bitcoin", 260, max_gap=900) == 2.0
+        assert history.price_at("bitcoin", 300, max_gap=900) == 3.0
+        assert history.price_at("bitcoin", 5000, max_gap=900) is None
+        assert history.price_at("bitcoin", 99, max_gap=900) is None
+        assert history.price_at("ethereum", 200, max_gap=900) is None
+    finally:
+        history.close()
+
+
+def test_price_at_after_the_ring_buffer_wraps(tmp_path):
+    history = PriceHistory(str(tmp_path), capacity=4)
+    try:
+        for timestamp in range(1, 11):
+            history.record("near", timestamp * 60, float(timestamp))
+
+        assert history.price_at("near", 9 * 60 + 59, max_gap=120) == 9.0
+        # Samples 1-6 were overwritten.
+        assert history.price_at("near", 6 * 60, max_gap=120) is None
+    finally:
+        history.close()
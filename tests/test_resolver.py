@@ -0,0 +1,149 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import resolver
+from bench.fakes import (CallLog, FakeContract, FakeHttpSession, FakeNearAccount, FakeNearProvider, LegacyFakeContract,
+                         fake_sign)
+from price_history import PriceHistory
+from submitter import ResolutionSubmitter
+
+YOCTO = 10 ** 24
+
+
+def market(market_id, bets):
+    yes = sum(amount for _, amount, outcome in bets if outcome == 0)
+    no = sum(amount for _, amount, outcome in bets if outcome == 1)
+    return {
+        "id": market_id, "description": f"crypto bitcoin > {market_id}", "endTime": "0",
+        "yesPool": str(yes), "noPool": str(no), "resolved": False, "outcome": 2,
+        "settled": False, "settleCursor": 0,
+        "bets": [{"user": user, "amount": str(amount), "outcome": outcome} for user, amount, outcome in bets],
+    }
+
+
+def test_transfer_obligation_matches_contract_payouts():
+    markets = [
+        # Winners share the losing pool, rounded down per bet: 1 + 1 * 2 // 3 = 1 and 2 + 2 * 2 // 3 = 3.
+        market(1, [("a.testnet", 1, 0), ("b.testnet", 2, 0), ("c.testnet", 2, 1)]),
+        # Nobody backed "yes": everyone is refunded.
+        market(2, [("a.testnet", 5 * YOCTO, 1), ("c.testnet", 7, 1)]),
+    ]
+    resolver.context.oracle_account = FakeNearAccount(FakeContract(markets, CallLog()))
+    try:
+        total, missing = resolver.transfer_obligation([(1, "yes"), (2, "yes"), (3, "no")])
+    finally:
+        resolver.context.reset("oracle_account")
+
+    assert total == (1 + 3) + (5 * YOCTO + 7)
+    assert missing == [3]
+
+
+def settle_with_fakes(contract):
+    calls = contract.calls
+    signer = SimpleNamespace(account_id="oracle.testnet",
+                             key_pair=SimpleNamespace(encoded_public_key=lambda: "ed25519:oracle"))
+    resolver.context.oracle_account = FakeNearAccount(contract)
+    resolver.context.submitter = ResolutionSubmitter(FakeNearProvider(contract, calls), signer, "contract.testnet",
+                                                     gas=10 ** 14, sign=fake_sign, sleep=lambda seconds: None)
+    return calls
+
+
+def resolved_market(market_id, bet_count):
+    m = market(market_id, [(f"user{i}.testnet", i + 1, i % 2) for i in range(bet_count)])
+    m.update(resolved=True, outcome=0)
+    return m
+
+
+def test_settle_markets_drives_settle_batch_to_completion(monkeypatch):
+    monkeypatch.setattr(resolver, "SETTLE_BATCH_SIZE", 10)
+    contract = FakeContract([resolved_market(1, 25), resolved_market(2, 5)], CallLog())
+    calls = settle_with_fakes(contract)
+    try:
+        resolver.settle_markets([1, 2])
+    finally:
+        resolver.context.reset("oracle_account", "submitter")
+
+    assert contract.markets[1]["settled"] and contract.markets[1]["settleCursor"] == 25
+    assert contract.markets[2]["settled"]
+    assert calls.counts["near.tx.settleBatch"] == 3 + 1
+
+
+def test_settle_markets_rejects_a_batch_size_that_cannot_advance(monkeypatch):
+    monkeypatch.setattr(resolver, "SETTLE_BATCH_SIZE", 0)
+    with pytest.raises(ValueError):
+        resolver.settle_markets([1])
+
+
+def test_settle_markets_stops_when_the_cursor_does_not_move(monkeypatch):
+    class StuckContract(FakeContract):
+        def _call_settleBatch(self, marketId, cursor, limit):
+            return self.markets[marketId]["settleCursor"]
+
+    contract = StuckContract([resolved_market(1, 25)], CallLog())
+    calls = settle_with_fakes(contract)
+    try:
+        resolver.settle_markets([1])
+    finally:
+        resolver.context.reset("oracle_account", "submitter")
+
+    assert calls.counts["near.tx.settleBatch"] == 1
+    assert not contract.markets[1]["settled"]
+
+
+def test_crypto_markets_without_a_price_at_end_time_stay_unresolved(tmp_path):
+    now = time.time()
+    markets = [market(1, [("a.testnet", 1, 0)]), market(2, [("a.testnet", 1, 0)]), market(3, [("a.testnet", 1, 0)])]
+    # Ended an hour ago with no sample; ended a minute ago; ended an hour ago with a sample.
+    for m, description, ended in ((markets[0], "crypto bitcoin > 1", 3600), (markets[1], "crypto bitcoin > 1", 60),
+                                  (markets[2], "crypto ethereum > 1000", 3600)):
+        m.update(description=description, endTime=str(int((now - ended) * 1e9)))
+    contract = FakeContract(markets, CallLog())
+    calls = settle_with_fakes(contract)
+    resolver.context.http_client.session = FakeHttpSession(calls)
+    resolver.context.price_history = PriceHistory(str(tmp_path))
+    resolver.context.price_history.record("ethereum", now - 3610, 2000.0)
+    try:
+        unresolved = resolver.resolve_markets(resolver.get_expired_markets(int(now * 1e9)))
+    finally:
+        resolver.context.price_history.close()
+        resolver.context.reset("oracle_account", "submitter", "http_client", "price_history")
+
+    assert unresolved == [1]
+    assert not contract.markets[1]["resolved"]
+    assert contract.markets[2]["outcome"] == 0
+    assert contract.markets[3]["outcome"] == 0
+
+
+def test_expired_markets_fall_back_to_get_all_markets_on_a_legacy_contract():
+    markets = [market(1, [("a.testnet", 1, 0)]), market(2, [("a.testnet", 1, 0)])]
+    markets[1]["endTime"] = str(time.time_ns() + 10 ** 12)
+    contract = LegacyFakeContract(markets, CallLog())
+    resolver.context.oracle_account = FakeNearAccount(contract)
+    try:
+        expired = resolver.get_expired_markets(time.time_ns())
+        unresolved = resolver.get_unresolved_markets()
+    finally:
+        resolver.context.reset("oracle_account")
+
+    assert [m["id"] for m in expired] == [1]
+    assert "bets" not in expired[0]
+    assert [m["id"] for m in unresolved] == [1, 2]
+
+
+def test_scores_and_prices_are_fetched_in_one_batch():
+    calls = CallLog()
+    client = resolver.context.http_client
+    client.session = FakeHttpSession(calls)
+    batches = []
+    get_json_many = client.get_json_many
+    client.get_json_many = lambda urls: batches.append(list(urls)) or get_json_many(urls)
+    try:
+        scores_by_sport, prices = resolver.fetch_market_data({"basketball_nba", "soccer_epl"}, {"bitcoin"})
+    finally:
+        resolver.context.reset("http_client")
+
+    assert len(batches) == 1
+    assert sorted(scores_by_sport) == ["basketball_nba", "soccer_epl"]
+    assert set(prices) == {"bitcoin"}
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+from submitter import ResolutionSubmitter
+from bench.fakes import CallLog, FakeContract, FakeNearProvider, fake_sign
+
+
+def market(market_id, resolved=False):
+    return {
+        "id": market_id, "description": f"crypto bitcoin > {market_id}", "endTime": "0",
+        "yesPool": "1", "noPool": "1", "resolved": resolved, "outcome": 2,
+        "settled": resolved, "settleCursor": 0,
+        "bets": [{"user": "a.testnet", "amount": "1", "outcome": 0},
+                 {"user": "b.testnet", "amount": "1", "outcome": 1}],
+    }
+
+
+class FlakyProvider(FakeNearProvider):
+    """
+    Rejects the first broadcast of each market in `fail_once`, like a node that
+    dropped the transaction.
+    """
+
+    def __init__(self, contract, calls, fail_once):
+        super().__init__(contract, calls)
+        self.fail_once = set(fail_once)
+        self.nonces = []
+
+    def send_tx(self, signed):
+        nonce, method_name, args = signed
+        self.nonces.append(nonce)
+        if args["marketId"] in self.fail_once:
+            self.fail_once.discard(args["marketId"])
+            raise RuntimeError("Transaction dropped")
+        return super().send_tx(signed)
+
+
+def make_submitter(markets, fail_once=()):
+    calls = CallLog()
+    contract = FakeContract(markets, calls)
+    provider = FlakyProvider(contract, calls, fail_once)
+    signer = SimpleNamespace(account_id="oracle.testnet",
+                             key_pair=SimpleNamespace(encoded_public_key=lambda: "ed25519:oracle"))
+    submitter = ResolutionSubmitter(provider, signer, "contract.testnet", gas=10 ** 14, sign=fake_sign,
+                                    sleep=lambda seconds: None)
+    return submitter, provider, contract, calls
+
+
+def test_one_round_increments_the_nonce_per_transaction():
+    submitter, provider, contract, calls = make_submitter([market(1), market(2), market(3)])
+
+    results = submitter.submit_all([(1, "yes"), (2, "no"), (3, "yes")])
+
+    assert results == {1: None, 2: None, 3: None}
+    assert provider.nonces == [1, 2, 3]
+    assert calls.counts["near.rpc.get_access_key"] == 1
+    assert [contract.markets[i]["outcome"] for i in (1, 2, 3)] == [0, 1, 0]
+
+
+def test_failed_transactions_are_retried_with_a_fresh_nonce():
+    submitter, provider, contract, calls = make_submitter([market(1), market(2), market(3)], fail_once=[2])
+
+    results = submitter.submit_all([(1, "yes"), (2, "no"), (3, "yes")])
+
+    assert results == {1: None, 2: None, 3: None}
+    # Market 2 was signed with nonce 2 and dropped; the second round re-reads the
+    # chain's nonce (3) and only resends market 2.
+    assert provider.nonces == [1, 2, 3, 4]
+    assert calls.counts["near.rpc.get_access_key"] == 2
+    assert calls.counts["near.tx.resolveMarketWithOutcome"] == 3
+    assert contract.markets[2]["resolved"]
+
+
+def test_terminal_errors_are_not_retried():
+    submitter, provider, contract, calls = make_submitter([market(1), market(2, resolved=True)])
+
+    results = submitter.submit_all([(1, "yes"), (2, "no")])
+
+    assert results[1] is None
+    assert "Market already resolved" in results[2]
+    assert calls.counts["near.rpc.broadcast_tx_async"] == 2
+    assert calls.counts["near.rpc.get_access_key"] == 1
+
+
+def test_rpc_errors_before_broadcasting_are_retried():
+    submitter, provider, contract, calls = make_submitter([market(1), market(2)])
+    get_status = provider.get_status
+    failures = iter([RuntimeError("Server error")])
+
+    def flaky_get_status():
+        for error in failures:
+            raise error
+        return get_status()
+
+    provider.get_status = flaky_get_status
+    results = submitter.submit_all([(1, "yes"), (2, "no")])
+
+    assert results == {1: None, 2: None}
+    assert provider.nonces == [1, 2]
+    assert calls.counts["near.rpc.get_access_key"] == 2
+
+
+def test_rpc_errors_in_every_round_become_per_call_errors():
+    submitter, provider, contract, calls = make_submitter([market(1)])
+
+    def get_access_key(account_id, public_key):
+        raise RuntimeError("Server error")
+
+    provider.get_access_key = get_access_key
+    results = submitter.submit_all([(1, "yes")])
+
+    assert results == {1: "Server error"}
+    assert provider.nonces == []